@@ -0,0 +1,66 @@
+"""Benchmark schedule file discovery on a synthetic multi-year directory tree.
+
+Run from the repository root with::
+
+    python -m benchmarks.discovery [--years 10] [--repeat 20]
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+from schedule_analyzer import find_schedule_files
+
+
+def create_empty_tree(root: Path, years: int) -> int:
+    """Create empty ``YYYY/MM/DD.yaml`` files for ``years`` years up to today.
+
+    Returns:
+        The number of files created
+
+    """
+    today = date.today()  # noqa: DTZ011
+    day = today.replace(year=today.year - years)
+    count = 0
+    while day <= today:
+        path = root / f"{day.year:04d}" / f"{day.month:02d}" / f"{day.day:02d}.yaml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        day += timedelta(days=1)
+        count += 1
+    return count
+
+
+def glob_all_schedule_files(root: Path) -> list[Path]:
+    """Find all day files with a recursive glob, for comparison."""
+    return sorted(root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9].yaml"))
+
+
+def main() -> None:
+    """Time schedule file discovery and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        file_count = create_empty_tree(root, args.years)
+        for name, function in [
+            ("find_schedule_files", lambda: find_schedule_files(str(root))),
+            ("glob_all_schedule_files", lambda: glob_all_schedule_files(root)),
+        ]:
+            seconds = min(timeit.repeat(function, number=1, repeat=args.repeat))
+            sys.stdout.write(
+                f"{name}: {seconds * 1000:.2f} ms for a tree of {file_count} files\n",
+            )
+
+
+if __name__ == "__main__":
+    main()
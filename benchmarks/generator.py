@@ -0,0 +1,161 @@
+"""Generate synthetic schedule trees in the Yle scraper format.
+
+Each channel gets a weekly program grid with hourly news, slightly varying start
+times and occasional one-off programs, written as ``YYYY/MM/DD.yaml`` files.
+Run from the repository root with::
+
+    python -m benchmarks.generator OUTPUT_DIR [--channels 2] [--weeks 5]
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+TIMEZONE = "Europe/Helsinki"
+SERIES_WORDS = [
+    "Aamu",
+    "Ilta",
+    "Klassinen",
+    "Kulttuuri",
+    "Maailma",
+    "Musiikki",
+    "Radio",
+    "Tiede",
+    "Tunti",
+    "Viikko",
+]
+
+
+def series_name(rng: random.Random) -> str:
+    """Return a random two-word series name."""
+    return " ".join(rng.sample(SERIES_WORDS, 2)) + f" {rng.randrange(100)}"
+
+
+def weekly_grid(
+    rng: random.Random,
+    programs_per_day: int,
+) -> list[list[tuple[int, str]]]:
+    """Create the (minute of day, series) grid of each weekday."""
+    slot_minutes = 24 * 60 // programs_per_day
+    grid = []
+    for _weekday in range(7):
+        day_grid = []
+        for index in range(programs_per_day):
+            minute = index * slot_minutes
+            if minute % 60 == 0:
+                day_grid.append((minute, "Yle Uutiset ja sää"))
+            else:
+                day_grid.append((minute, series_name(rng)))
+        grid.append(day_grid)
+    return grid
+
+
+def day_programs(
+    rng: random.Random,
+    day: date,
+    grid: list[list[tuple[int, str]]],
+    channel: str,
+) -> list[dict]:
+    """Create the program entries of one day from the weekly grid."""
+    tz = ZoneInfo(TIMEZONE)
+    midnight = datetime(day.year, day.month, day.day, tzinfo=tz)
+    programs = []
+    day_grid = grid[day.weekday()]
+    for index, (minute, series) in enumerate(day_grid):
+        name = series_name(rng) if rng.random() < 0.05 else series  # noqa: PLR2004
+        jitter = timedelta(minutes=minute, seconds=rng.randrange(-120, 121))
+        start = midnight + max(jitter, timedelta(0))
+        end_minute = day_grid[index + 1][0] if index + 1 < len(day_grid) else 24 * 60
+        end = midnight + timedelta(minutes=end_minute)
+        programs.append(
+            {
+                "id": f"{channel}-{start:%Y%m%d%H%M%S}",
+                "title": name,
+                "series": name,
+                "start_time": start.isoformat(),
+                "end_time": end.isoformat(),
+                "description": " ".join(rng.choices(SERIES_WORDS, k=30)),
+                "image": f"https://images.example/{rng.randrange(10**9)}.jpg",
+            },
+        )
+    return programs
+
+
+def write_day(path: Path, channel: str, programs: list[dict]) -> None:
+    """Write one day of programs as a YAML schedule file."""
+    lines = ["metadata:", f"  timezone: {TIMEZONE}", "data:", f"  {channel}:"]
+    lines.append("    programmes:")
+    for program in programs:
+        key, *keys = program
+        # JSON strings are valid double-quoted YAML scalars
+        lines.append(f"      - {key}: {json.dumps(program[key], ensure_ascii=False)}")
+        lines.extend(
+            f"        {key}: {json.dumps(program[key], ensure_ascii=False)}"
+            for key in keys
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def generate_tree(  # noqa: PLR0913
+    root: Path,
+    *,
+    channels: int = 1,
+    weeks: int = 5,
+    programs_per_day: int = 48,
+    end: date | None = None,
+    seed: int = 0,
+) -> list[Path]:
+    """Write schedule trees for ``channels`` channels under ``root``.
+
+    Each channel covers ``weeks`` weeks ending on ``end`` (by default a week from
+    today) in its own ``root/channel-N`` directory.
+
+    Returns:
+        The channel directories
+
+    """
+    rng = random.Random(seed)  # noqa: S311
+    end = end or date.today() + timedelta(weeks=1)  # noqa: DTZ011
+    channel_dirs = []
+    for channel_number in range(channels):
+        channel = f"channel-{channel_number}"
+        channel_dir = root / channel
+        grid = weekly_grid(rng, programs_per_day)
+        for offset in range(weeks * 7):
+            day = end - timedelta(days=offset)
+            write_day(
+                channel_dir / f"{day:%Y}" / f"{day:%m}" / f"{day:%d}.yaml",
+                channel,
+                day_programs(rng, day, grid, channel),
+            )
+        channel_dirs.append(channel_dir)
+    return channel_dirs
+
+
+def main() -> None:
+    """Generate a synthetic schedule tree from command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path, help="Directory to write channels into")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--weeks", type=int, default=5)
+    parser.add_argument("--programs-per-day", type=int, default=48)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_tree(
+        args.output,
+        channels=args.channels,
+        weeks=args.weeks,
+        programs_per_day=args.programs_per_day,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Time each stage of the schedule analyzer pipeline at several data scales.
+
+The stages are file discovery, YAML parsing, time slot matching, date formatting
+and HTML rendering. Results are written as JSON for comparing runs. Run from the
+repository root with::
+
+    python -m benchmarks.pipeline [--scale small] [--output results.json]
+                                  [--baseline previous.json]
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from benchmarks.generator import generate_tree
+from schedule_analyzer import (
+    RecurringAnalysis,
+    find_schedule_files,
+    format_dates,
+    format_time,
+    parse_day,
+)
+from templates.html_generator import generate_html_table
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# name: (channels, weeks, programs per day)
+SCALES = {
+    "small": (1, 5, 48),
+    "medium": (3, 13, 96),
+    "large": (5, 52, 48),
+}
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Return the shortest wall time of ``repeat`` calls of ``function``."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_channel(channel_dir: Path, weeks: int, repeat: int) -> dict[str, float]:
+    """Time each pipeline stage on one channel directory."""
+    files = find_schedule_files(str(channel_dir), weeks=weeks)
+    days = [parse_day(file_path) for file_path in files]
+
+    def match() -> RecurringAnalysis:
+        analysis = RecurringAnalysis()
+        for _tz_name, programs in days:
+            analysis.add_programs(programs)
+        return analysis
+
+    recurring = match().recurring()
+    by_weekday = defaultdict(list)
+    for weekday, hour, minute, series, dates in recurring:
+        by_weekday[weekday].append((format_time(hour, minute), series, dates))
+
+    return {
+        "discovery": best_time(
+            lambda: find_schedule_files(str(channel_dir), weeks=weeks),
+            repeat,
+        ),
+        "parsing": best_time(lambda: [parse_day(f) for f in files], 1),
+        "matching": best_time(match, repeat),
+        "formatting": best_time(
+            lambda: [format_dates(row[4]) for row in recurring],
+            repeat,
+        ),
+        "rendering": best_time(
+            lambda: generate_html_table(by_weekday, files, tz_name=days[0][0]),
+            repeat,
+        ),
+    }
+
+
+def run_scale(scale: str, repeat: int) -> list[dict]:
+    """Generate data for ``scale`` and return result records of each stage."""
+    channels, weeks, programs_per_day = SCALES[scale]
+    totals: dict[str, float] = defaultdict(float)
+    with tempfile.TemporaryDirectory() as tmp:
+        channel_dirs = generate_tree(
+            Path(tmp) / "data",
+            channels=channels,
+            weeks=weeks,
+            programs_per_day=programs_per_day,
+        )
+        for channel_dir in channel_dirs:
+            for stage, seconds in benchmark_channel(channel_dir, weeks, repeat).items():
+                totals[stage] += seconds
+    return [
+        {
+            "scale": scale,
+            "stage": stage,
+            "seconds": seconds,
+            "channels": channels,
+            "weeks": weeks,
+            "programs_per_day": programs_per_day,
+        }
+        for stage, seconds in totals.items()
+    ]
+
+
+def main() -> None:
+    """Run the benchmarks and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale",
+        action="append",
+        choices=SCALES,
+        help="Data scale to benchmark, may be repeated (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Write JSON results to this file")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Compare against JSON results from an earlier run",
+    )
+    args = parser.parse_args()
+
+    results = [
+        record
+        for scale in args.scale or SCALES
+        for record in run_scale(scale, args.repeat)
+    ]
+    report = {
+        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    baseline = {}
+    if args.baseline:
+        previous = json.loads(args.baseline.read_text())
+        baseline = {(r["scale"], r["stage"]): r["seconds"] for r in previous["results"]}
+    for record in results:
+        line = f"{record['scale']:>8} {record['stage']:>12} {record['seconds']:10.4f} s"
+        previous_seconds = baseline.get((record["scale"], record["stage"]))
+        if previous_seconds:
+            line += f" ({record['seconds'] / previous_seconds:.2f}x baseline)"
+        sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Measure the startup time of the schedule analyzer with ``python -X importtime``.
+
+Run from the repository root with::
+
+    python -m benchmarks.startup [--repeat 5] [--budget 2]
+
+The time of importing the ``schedule_analyzer`` module and the modules it imports
+is compared against the time of importing a few standard library modules any
+command line tool needs, measured in the same way, so that the budget doesn't
+depend on the speed of the machine. The slowest direct imports are listed. The
+exit status is non-zero if the budget is exceeded or if a heavy dependency is
+imported at startup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Imported only by the code paths which need them
+HEAVY_MODULES = frozenset(
+    {
+        "concurrent.futures.process",
+        "http.server",
+        "jinja2",
+        "msgpack",
+        "orjson",
+        "ruamel.yaml",
+        "sqlite3",
+        "yaml",
+        "zoneinfo",
+    },
+)
+# Imported by the baseline against which the startup time is measured
+BASELINE_MODULES = ("argparse", "json", "logging", "pathlib")
+# Maximum startup time as a multiple of the baseline
+STARTUP_BUDGET = 2
+REPOSITORY_ROOT = Path(__file__).parent.parent
+
+
+def import_times(argv: list[str]) -> list[tuple[str, int, int]]:
+    """Run Python with ``-X importtime`` and the given arguments.
+
+    Bytecode is written even if ``PYTHONDONTWRITEBYTECODE`` is set, so that only
+    the first run includes the time of compiling changed modules.
+
+    Returns:
+        The name, nesting level and cumulative import time in microseconds of each
+        module imported during the run, in the order the imports finished
+
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", *argv],
+        capture_output=True,
+        check=True,
+        cwd=REPOSITORY_ROOT,
+        env={
+            name: value
+            for name, value in os.environ.items()
+            if name != "PYTHONDONTWRITEBYTECODE"
+        },
+        text=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line.removeprefix("import time:").split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        times.append((name.strip(), level, int(cumulative)))
+    return times
+
+
+def imported_by(
+    times: list[tuple[str, int, int]],
+    module: str,
+) -> tuple[int, list[tuple[str, int, int]]]:
+    """Return the import time of a top-level module and the modules it imported.
+
+    Nested imports are reported before the module importing them, so the modules
+    imported by ``module`` are the ones since the previous top-level import.
+    """
+    start = 0
+    for index, (name, level, cumulative) in enumerate(times):
+        if level == 0 and name == module:
+            return cumulative, times[start:index]
+        if level == 0:
+            start = index + 1
+    message = f"{module} was not imported"
+    raise ValueError(message)
+
+
+def baseline_time(repeat: int) -> int:
+    """Return the fastest of ``repeat`` imports of the baseline modules.
+
+    Returns:
+        The import time in microseconds of the `BASELINE_MODULES` not imported
+        already when the interpreter starts
+
+    """
+    argv = ["-c", f"import {', '.join(BASELINE_MODULES)}"]
+    return min(
+        sum(
+            cumulative
+            for name, level, cumulative in import_times(argv)
+            if level == 0 and name in BASELINE_MODULES
+        )
+        for _ in range(repeat)
+    )
+
+
+def startup_time(repeat: int) -> tuple[int, list[tuple[str, int, int]]]:
+    """Return the fastest of ``repeat`` imports of the module in new interpreters.
+
+    Returns:
+        The import time in microseconds, and the name, nesting level and import time
+        of each module imported by it
+
+    """
+    argv = ["-c", "import schedule_analyzer"]
+    return min(
+        imported_by(import_times(argv), "schedule_analyzer") for _ in range(repeat)
+    )
+
+
+def main() -> None:
+    """Measure the startup time and report it against the budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=STARTUP_BUDGET,
+        help="Startup time budget as a multiple of the time of importing "
+        f"{', '.join(BASELINE_MODULES)} (default: %(default)s)",
+    )
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = baseline_time(args.repeat)
+    total, imports = startup_time(args.repeat)
+    direct = sorted(
+        ((cumulative, name) for name, level, cumulative in imports if level == 1),
+        reverse=True,
+    )
+    for cumulative, name in direct[: args.top]:
+        sys.stdout.write(f"{cumulative / 1000:8.2f} ms  {name}\n")
+    budget = args.budget * baseline
+    sys.stdout.write(
+        f"{total / 1000:8.2f} ms  schedule_analyzer "
+        f"(budget {budget / 1000:.2f} ms = {args.budget} x {baseline / 1000:.2f} ms)\n",
+    )
+    heavy = sorted(HEAVY_MODULES.intersection(name for name, _, _ in imports))
+    if heavy:
+        sys.stdout.write(f"Heavy modules imported at startup: {', '.join(heavy)}\n")
+    if heavy or total > budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
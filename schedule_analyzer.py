@@ -4,144 +4,2565 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import importlib.util
+import json
 import logging
+import os
+import re
+import struct
 import sys
-from collections import defaultdict
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from datetime import datetime, timedelta, timezone
+from functools import cache, cached_property, lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, NoReturn, Self
 
-from ruamel.yaml import YAML
+if TYPE_CHECKING:
+    from collections.abc import (
+        Callable,
+        Container,
+        Generator,
+        Iterable,
+        Iterator,
+        KeysView,
+    )
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = "Europe/Helsinki"
+CACHE_FILENAME = "schedule-cache.sqlite3"
+CACHE_SCHEMA_VERSION = 3
+CACHE_COMMIT_BATCH = 64
+SLOT_TOLERANCE = timedelta(minutes=13)
+STATE_VERSION = 5
+OUTPUT_BUFFER_SIZE = 64 * 1024
+SIDECAR_SUFFIXES = {"json": ".json", "msgpack": ".msgpack"}
+YAML_LOADERS = ("ruamel", "pyyaml")
+LOADERS = ("auto", "scan", "ruamel", "pyyaml", "json", "msgpack")
+READ_AHEAD_DEPTH = 8
+READ_AHEAD_MEMORY_MIB = 64
+SECONDS_PER_DAY = 24 * 60 * 60
+EPOCH = datetime(1970, 1, 1)  # noqa: DTZ001
+EPOCH_ORDINAL = EPOCH.toordinal()
+EPOCH_WEEKDAY = EPOCH.weekday()
+ONE_SECOND = timedelta(seconds=1)
+SERIES_CACHE_SIZE = 4096
+ARCHIVE_FILENAME = "schedule.pack"
+ARCHIVE_MAGIC = b"SCHEDPAK"
+ARCHIVE_VERSION = 1
+ARCHIVE_BYTEORDERS = {"little": 1, "big": 2}
+ARCHIVE_ALIGNMENT = 8
+# magic, version, byte order of columns, offset of the current index
+ARCHIVE_HEADER = struct.Struct("<8sIIQ")
+ARCHIVE_COUNT = struct.Struct("<Q")
+# date ordinal, record offset, record length, file mtime_ns, file size
+ARCHIVE_INDEX_ENTRY = struct.Struct("<iQIqq")
+# lengths of the timezone and the series names in bytes, number of programs
+ARCHIVE_RECORD = struct.Struct("<III")
+DEFAULT_SERIES_ALIASES = {"Yle Uutiset ja sää": "Yle Uutiset"}
+
+
+def setup_logging(*, debug: bool = False) -> None:
+    """Configure logging with optional debug level."""
+    logging.basicConfig(
+        level=logging.DEBUG if debug else logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+class Profiler:
+    """Wall time, CPU time and peak memory of pipeline stages, and event counters.
+
+    Stages entered several times accumulate their times. While disabled, stages
+    and counters cost next to nothing. Peak memory is traced only on request,
+    since tracing every allocation slows the stages and distorts their times.
+    """
+
+    def __init__(self) -> None:
+        """Create a disabled profiler."""
+        self.enabled = False
+        self.memory = False
+        self.stages: dict[str, dict[str, float]] = {}
+        self.counters: dict[str, int] = defaultdict(int)
+
+    def enable(self, *, memory: bool = False) -> None:
+        """Start recording stages and counters, and memory allocations if asked."""
+        self.enabled = True
+        if memory:
+            import tracemalloc  # noqa: PLC0415
+
+            self.memory = True
+            tracemalloc.start()
+
+    def disable(self) -> None:
+        """Stop recording, and stop tracing memory allocations if it was started."""
+        if self.memory:
+            import tracemalloc  # noqa: PLC0415
+
+            tracemalloc.stop()
+        self.enabled = self.memory = False
+
+    def stage(self, name: str) -> AbstractContextManager[None]:
+        """Return a context manager recording the resources used by a stage."""
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name: str) -> Generator[None]:
+        if self.memory:
+            import tracemalloc  # noqa: PLC0415
+
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(
+                name,
+                {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0},
+            )
+            stage["calls"] += 1
+            stage["wall_seconds"] += time.perf_counter() - wall_start
+            stage["cpu_seconds"] += time.process_time() - cpu_start
+            if self.memory:
+                stage["peak_memory_bytes"] = max(
+                    stage.get("peak_memory_bytes", 0),
+                    tracemalloc.get_traced_memory()[1],
+                )
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add ``amount`` to the counter ``name``."""
+        if self.enabled:
+            self.counters[name] += amount
+
+    def report(self) -> dict:
+        """Return the recorded stages and counters as a JSON-serializable dict."""
+        return {"stages": self.stages, "counters": dict(self.counters)}
+
+    def write_report(self, destination: str) -> None:
+        """Write the report as JSON to a file, or to stderr if ``destination`` is -."""
+        report = json.dumps(self.report(), indent=2)
+        if destination == "-":
+            sys.stderr.write(report + "\n")
+        else:
+            Path(destination).write_text(report + "\n", encoding="utf-8")
+
+
+profiler = Profiler()
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        Parsed command line arguments
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Analyze recurring programs from schedule YAML files",
+    )
+    parser.add_argument(
+        "-d",
+        "--directory",
+        action="append",
+        default=[],
+        help="Root directory containing YYYY/MM/DD.yml schedule files "
+        "(may be repeated to analyze several channels)",
+    )
+    parser.add_argument(
+        "--channels",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Glob pattern matching channel root directories, e.g. 'yle/yle-*'",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        help="Write one output file per channel and an index page to this directory "
+        "(required for several channels)",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug logging",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["text", "html", "json", "ndjson"],
+        default="text",
+        help="Output format (text, html, or JSON records as an array or one per "
+        "line written to standard output)",
+    )
+    parser.add_argument(
+        "--weeks",
+        type=positive_int,
+        default=4,
+        help="Number of weeks to analyze before the newest schedule file "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--since",
+        type=parse_date,
+        metavar="YYYY-MM-DD",
+        help="Analyze schedule files from this date on instead of --weeks weeks",
+    )
+    parser.add_argument(
+        "--until",
+        type=parse_date,
+        metavar="YYYY-MM-DD",
+        help="Ignore schedule files after this date",
+    )
+    parser.add_argument(
+        "--stability",
+        type=positive_int,
+        metavar="WEEKS",
+        help="Also report the time slots which were stable in each period of WEEKS "
+        "weeks, e.g. 13 for quarters (text output only)",
+    )
+    parser.add_argument(
+        "--loader",
+        choices=LOADERS,
+        default="auto",
+        help="Schedule file parser backend (default: %(default)s, which reads "
+        "converted sidecar files if fresh and otherwise the fastest YAML parser)",
+    )
+    parser.add_argument(
+        "--series-rules",
+        type=series_rules_argument,
+        default={},
+        metavar="FILE",
+        help="YAML or TOML file with alias and pattern rules for normalizing "
+        "series titles",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=default_cache_dir(),
+        help="Directory for the parsed schedule cache (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse all schedule files without reading or writing the cache",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Discard the cache contents and parse all schedule files again",
+    )
+    parser.add_argument(
+        "--cache-verify-hash",
+        action="store_true",
+        help="Accept cache entries whose content hash matches even if mtime changed",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for parsing schedule files "
+        "(0 uses all CPUs, default: %(default)s)",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=READ_AHEAD_DEPTH,
+        metavar="FILES",
+        help="Number of schedule files read in background threads ahead of "
+        "parsing (0 disables reading ahead, default: %(default)s)",
+    )
+    parser.add_argument(
+        "--read-ahead-memory",
+        type=int,
+        default=READ_AHEAD_MEMORY_MIB,
+        metavar="MIB",
+        help="Maximum size of the schedule files read ahead in MiB "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the saved analysis state with new schedule files only",
+    )
+    parser.add_argument(
+        "--state-file",
+        type=Path,
+        help="Analysis state file for --incremental "
+        "(default: a file in the cache directory)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="Write per-stage timings and counters as JSON to FILE (default: stderr)",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Also trace the peak memory of each stage in the --profile report "
+        "(slows the run down)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="FILE",
+        help="Write cProfile statistics of the whole run to FILE",
+    )
+    args = parser.parse_args()
+    args.directories = channel_directories(args.directory, args.channels)
+    if not args.directories:
+        parser.error("no channel directories given or matched")
+    if len(args.directories) > 1 and args.output_dir is None:
+        parser.error("--output-dir is required for analyzing several channels")
+    if len(args.directories) > 1 and args.state_file is not None:
+        parser.error("--state-file can't be used with several channels")
+    if args.since is not None and args.until is not None and args.since > args.until:
+        parser.error("--since must not be after --until")
+    if args.stability is not None and args.format != "text":
+        parser.error("--stability requires text output")
+    if args.profile_memory and args.profile is None:
+        parser.error("--profile-memory requires --profile")
+    if not loader_available(args.loader):
+        parser.error(f"--loader {args.loader} requires the fast extra to be installed")
+    names = [Path(directory).name for directory in args.directories]
+    if len(set(names)) < len(names):
+        parser.error("channel directories must have distinct names")
+    return args
+
+
+def series_rules_argument(value: str) -> dict:
+    """Load the series normalization rules file given on the command line."""
+    try:
+        return load_series_rules(value)
+    except (OSError, ValueError) as error:
+        raise argparse.ArgumentTypeError(str(error)) from error
+
+
+def parse_date(value: str) -> datetime.date:
+    """Parse a YYYY-MM-DD date given on the command line."""
+    return datetime.fromisoformat(value).date()
+
+
+def positive_int(value: str) -> int:
+    """Parse a positive integer given on the command line."""
+    number = int(value)
+    if number < 1:
+        msg = f"must be at least 1, got {number}"
+        raise argparse.ArgumentTypeError(msg)
+    return number
+
+
+def parse_convert_args(argv: list[str]) -> argparse.Namespace:
+    """Parse command line arguments of the ``convert`` subcommand.
+
+    Returns:
+        Parsed command line arguments
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="schedule-analyzer convert",
+        description="Write JSON or msgpack sidecar files next to schedule YAML files "
+        "for faster loading",
+    )
+    parser.add_argument(
+        "directories",
+        nargs="+",
+        metavar="DIRECTORY",
+        help="Root directory containing YYYY/MM/DD.yaml schedule files",
+    )
+    parser.add_argument(
+        "--to",
+        choices=[name for name in SIDECAR_SUFFIXES if name in available_loaders()],
+        default="json",
+        help="Sidecar file format (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--loader",
+        choices=[name for name in available_loaders() if name in YAML_LOADERS],
+        default=fastest_yaml_loader(),
+        help="YAML parser backend (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Convert also files whose sidecar file is up to date",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug logging",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_serve_args(argv: list[str]) -> argparse.Namespace:
+    """Parse command line arguments of the ``serve`` subcommand.
+
+    Returns:
+        Parsed command line arguments
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="schedule-analyzer serve",
+        description="Serve the HTML page of a channel over HTTP and update it when "
+        "schedule files are added or changed",
+    )
+    parser.add_argument(
+        "-d",
+        "--directory",
+        required=True,
+        help="Root directory containing YYYY/MM/DD.yml schedule files",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="Port to listen on (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=60,
+        help="Seconds between checks for new schedule files (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--weeks",
+        type=positive_int,
+        default=4,
+        help="Number of weeks to analyze before the newest schedule file "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--loader",
+        choices=LOADERS,
+        default="auto",
+        help="Schedule file parser backend (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--series-rules",
+        type=series_rules_argument,
+        default={},
+        metavar="FILE",
+        help="YAML or TOML file with alias and pattern rules for normalizing "
+        "series titles",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=default_cache_dir(),
+        help="Directory for the parsed schedule cache (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse all schedule files without reading or writing the cache",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for parsing schedule files "
+        "(0 uses all CPUs, default: %(default)s)",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=READ_AHEAD_DEPTH,
+        metavar="FILES",
+        help="Number of schedule files read in background threads ahead of "
+        "parsing (0 disables reading ahead, default: %(default)s)",
+    )
+    parser.add_argument(
+        "--read-ahead-memory",
+        type=int,
+        default=READ_AHEAD_MEMORY_MIB,
+        metavar="MIB",
+        help="Maximum size of the schedule files read ahead in MiB "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug logging",
+    )
+    parser.set_defaults(rebuild_cache=False, cache_verify_hash=False)
+    args = parser.parse_args(argv)
+    if not loader_available(args.loader):
+        parser.error(f"--loader {args.loader} requires the fast extra to be installed")
+    return args
+
+
+def channel_directories(directories: list[str], patterns: list[str]) -> list[str]:
+    """Return the given directories and those matching glob patterns, deduplicated."""
+    matched = list(directories)
+    for pattern in patterns:
+        matched.extend(
+            path
+            for path in sorted(glob.glob(pattern))  # noqa: PTH207
+            if Path(path).is_dir()
+        )
+    return list(dict.fromkeys(matched))
+
+
+def default_cache_dir() -> Path:
+    """Return the default cache directory following the XDG convention."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "schedule-analyzer"
+
+
+def find_schedule_files(
+    root_dir: str,
+    weeks: int = 4,
+    *,
+    since: datetime.date | None = None,
+    until: datetime.date | None = None,
+) -> list[Path]:
+    """Find all relevant YAML files from newest to oldest within time window.
+
+    If the directory has a schedule archive, the packed files are listed instead
+    of scanning the directory tree with `scan_schedule_files`.
+    """
+    archive = open_archive(root_dir)
+    if archive is not None:
+        return archive.find_files(Path(root_dir), weeks, since=since, until=until)
+    return scan_schedule_files(root_dir, weeks, since=since, until=until)
+
+
+def scan_schedule_files(
+    root_dir: str,
+    weeks: int = 4,
+    *,
+    since: datetime.date | None = None,
+    until: datetime.date | None = None,
+) -> list[Path]:
+    """Scan the directory tree for YAML files from newest to oldest in time window.
+
+    Directories are scanned newest first, and the time window is fixed as soon as
+    the newest day file is found. Year and month directories entirely outside the
+    window are not scanned at all. Files after ``until`` are ignored, and the
+    window starts from ``since`` if given, or otherwise ``weeks`` weeks before the
+    newest file.
+    """
+    root = Path(root_dir)
+    logger.debug("Searching in: %s", root)
+
+    log_directory_contents(root)
+
+    files = []
+    cutoff = None
+    newest = (until.year, until.month, until.day) if until else (9999, 12, 31)
+    oldest = (0, 0, 0)  # fixed when the newest file is found
+    for year, year_dir in scan_numbered_entries(root, 4, directories=True):
+        if year < oldest[0]:
+            break
+        logger.debug("Found year directory: %s", year_dir.name)
+        for month, month_dir in scan_numbered_entries(year_dir, 2, directories=True):
+            if (year, month) > newest[:2]:
+                continue
+            if (year, month) < oldest[:2]:
+                break
+            logger.debug("Found month directory: %s/%s", year_dir.name, month_dir.name)
+
+            log_directory_contents(month_dir)
+
+            for day, day_file in scan_numbered_entries(month_dir, 2, suffix=".yaml"):
+                if (year, month, day) > newest:
+                    continue
+                if cutoff is None:  # First file found
+                    latest_date = datetime(year, month, day, tzinfo=timezone.utc)
+                    cutoff = window_start(latest_date, weeks, since)
+                    oldest = (cutoff.year, cutoff.month, cutoff.day)
+                    logger.debug(
+                        "Date range: %s to %s",
+                        cutoff.date(),
+                        latest_date.date(),
+                    )
+                if (year, month, day) < oldest:
+                    logger.debug("Reached cutoff date: %s", day_file)
+                    break
+                logger.debug("Found schedule file: %s", day_file)
+                files.append(day_file)
+    return files
+
+
+def window_start(
+    latest_date: datetime,
+    weeks: int,
+    since: datetime.date | None = None,
+) -> datetime:
+    """Return the start of the analyzed time window.
+
+    Without ``since``, the window starts on the Monday on or before ``weeks``
+    weeks before the newest schedule file, or before today if that is earlier.
+    """
+    if since is not None:
+        return datetime(since.year, since.month, since.day, tzinfo=timezone.utc)
+    # Calculate initial cutoff date
+    cutoff = min(
+        datetime.now(tz=timezone.utc),
+        latest_date - timedelta(weeks=weeks),
+    )
+    # Adjust to previous Monday if needed
+    days_since_monday = cutoff.weekday()
+    if days_since_monday > 0:  # If not already Monday
+        cutoff -= timedelta(days=days_since_monday)
+    return cutoff
+
+
+def scan_numbered_entries(
+    directory: Path,
+    digits: int,
+    *,
+    directories: bool = False,
+    suffix: str = "",
+) -> list[tuple[int, Path]]:
+    """List entries named by a number of ``digits`` digits, newest first.
+
+    Uses a single `os.scandir` pass. With ``directories``, only subdirectories are
+    included, and ``suffix`` is required after the digits in each entry name.
+    """
+    entries = []
+    with os.scandir(directory) as scanner:
+        for entry in scanner:
+            name = entry.name
+            stem = name[:digits]
+            if (
+                len(name) == digits + len(suffix)
+                and name.endswith(suffix)
+                and stem.isascii()
+                and stem.isdigit()
+                and (not directories or entry.is_dir())
+            ):
+                entries.append((int(stem), directory / name))
+    entries.sort(reverse=True)
+    return entries
+
+
+def iter_schedule_files(root_dir: str | Path) -> Iterator[Path]:
+    """Yield all YYYY/MM/DD.yaml schedule files under a directory, newest first."""
+    for _year, year_dir in scan_numbered_entries(Path(root_dir), 4, directories=True):
+        for _month, month_dir in scan_numbered_entries(year_dir, 2, directories=True):
+            for _day, day_file in scan_numbered_entries(month_dir, 2, suffix=".yaml"):
+                yield day_file
+
+
+# Plain scalars which YAML 1.2 and ruamel.yaml resolve to other types than strings
+YAML12_BOOL = re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$")
+YAML12_FLOAT = re.compile(
+    r"""^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+    |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+    |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+    |[-+]?\.(?:inf|Inf|INF)
+    |\.(?:nan|NaN|NAN))$""",
+    re.VERBOSE,
+)
+YAML12_INT = re.compile(
+    r"""^(?:[-+]?0b[0-1_]+
+    |[-+]?0o?[0-7_]+
+    |[-+]?[0-9_]+
+    |[-+]?0x[0-9a-fA-F_]+)$""",
+    re.VERBOSE,
+)
+YAML12_NULL = re.compile(r"^(?:~|null|Null|NULL)$")
+START_TIME_PATTERN = re.compile(
+    r"(\d{4}-\d\d-\d\d[T ])(\d\d):(\d\d):(\d\d)(Z|[+-]\d\d:\d\d)?",
+    re.ASCII,
+)
+YAML12_TIMESTAMP = re.compile(
+    r"""^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+    |[0-9][0-9][0-9][0-9]-[0-9][0-9]?-[0-9][0-9]?
+    (?:[Tt]|[ \t]+)[0-9][0-9]?:[0-9][0-9]:[0-9][0-9](?:\.[0-9]*)?
+    (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$""",
+    re.VERBOSE,
+)
+
+
+@cache
+def ruamel_has_c_parser() -> bool:
+    """Return whether ruamel.yaml can use its C extension."""
+    return importlib.util.find_spec("_ruamel_yaml") is not None
+
+
+@cache
+def pyyaml_loader_class() -> type | None:
+    """Return a PyYAML ``CSafeLoader`` following YAML 1.2 rules, if available.
+
+    PyYAML implements YAML 1.1, where e.g. ``yes`` is a boolean, ``012`` is an
+    octal number and ``1:30`` is a sexagesimal number. The implicit resolvers for
+    booleans, integers and floats are replaced with the YAML 1.2 ones which
+    ruamel.yaml uses, so that both loaders parse schedules into the same data.
+    """
+    try:
+        import yaml  # noqa: PLC0415
+    except ImportError:
+        return None
+    if not hasattr(yaml, "CSafeLoader"):  # PyYAML built without libyaml
+        return None
+
+    replaced = {f"tag:yaml.org,2002:{kind}" for kind in ("bool", "int", "float")}
+
+    class Yaml12CSafeLoader(yaml.CSafeLoader):
+        yaml_implicit_resolvers = {  # noqa: RUF012
+            first: [(tag, regexp) for tag, regexp in resolvers if tag not in replaced]
+            for first, resolvers in yaml.CSafeLoader.yaml_implicit_resolvers.items()
+        }
+
+    def construct_int(loader: Yaml12CSafeLoader, node: yaml.Node) -> int:
+        value = loader.construct_scalar(node).replace("_", "")
+        sign = -1 if value.startswith("-") else 1
+        value = value.lstrip("+-")
+        base = {"0b": 2, "0o": 8, "0x": 16}.get(value[:2])
+        return sign * (int(value[2:], base) if base else int(value))
+
+    Yaml12CSafeLoader.add_implicit_resolver(
+        "tag:yaml.org,2002:bool",
+        YAML12_BOOL,
+        list("tTfF"),
+    )
+    Yaml12CSafeLoader.add_implicit_resolver(
+        "tag:yaml.org,2002:float",
+        YAML12_FLOAT,
+        list("-+0123456789."),
+    )
+    Yaml12CSafeLoader.add_implicit_resolver(
+        "tag:yaml.org,2002:int",
+        YAML12_INT,
+        list("-+0123456789"),
+    )
+    Yaml12CSafeLoader.add_constructor("tag:yaml.org,2002:int", construct_int)
+    return Yaml12CSafeLoader
+
+
+def msgpack_available() -> bool:
+    """Return whether the msgpack package is installed."""
+    return importlib.util.find_spec("msgpack") is not None
+
+
+def loader_available(backend: str) -> bool:
+    """Return whether a schedule loader backend can be used.
+
+    Only checking for PyYAML imports it, so the check is done on demand.
+    """
+    if backend == "pyyaml":
+        return pyyaml_loader_class() is not None
+    if backend == "msgpack":
+        return msgpack_available()
+    return backend in LOADERS
+
+
+def available_loaders() -> list[str]:
+    """Return the names of the schedule loader backends which can be used."""
+    return [backend for backend in LOADERS if loader_available(backend)]
+
+
+class ScheduleScanError(ValueError):
+    """Raised for YAML constructs which `ScheduleScanner` doesn't handle."""
+
+
+class ScheduleScanner:
+    """Extracts only the fields used by the analysis from a schedule YAML file.
+
+    The scanner reads the file line by line and understands only the block
+    mappings and sequences of the scraper's output. It keeps the timezone, the
+    first channel's programmes and their ``series``, ``title`` and ``start_time``
+    fields, and skips other values by their indentation without parsing them.
+    Anything it doesn't understand, like flow collections, anchors, tags, escapes
+    or multi-line values in the kept fields, raises `ScheduleScanError` so that
+    the caller can use a full YAML parser instead. The result has the same
+    structure as the full parse, pruned to the kept fields.
+    """
+
+    KEY_LINE = re.compile(r"([A-Za-z_][A-Za-z0-9_-]*):(?:[ ]+(.*))?")
+    PROGRAMME_KEYS = frozenset(["series", "title", "start_time"])
+
+    def __init__(self, content: bytes) -> None:
+        """Prepare scanning the raw content of a schedule file."""
+        try:
+            text = content.removeprefix(b"\xef\xbb\xbf").decode()
+        except UnicodeDecodeError as error:
+            raise ScheduleScanError(str(error)) from error
+        text = text.replace("\r\n", "\n")
+        if any(line_break in text for line_break in "\r\x85\u2028\u2029"):
+            message = "unusual line breaks"
+            raise ScheduleScanError(message)
+        # The indentation and content of lines which aren't blank or comments
+        self.lines = [
+            (len(line) - len(body), body)
+            for line in text.split("\n")
+            if (body := line.lstrip(" "))
+            and body[0] != "#"
+            and (body[0] != "\t" or body.strip())
+        ]
+        self.index = 0
+
+    def scan(self) -> dict:
+        """Return the schedule pruned to the fields used by the analysis."""
+        schedule: dict = {}
+        for key, value in self._entries(0):
+            if key == "metadata":
+                schedule["metadata"] = {
+                    key: self._scalar(value, indent)
+                    for indent, key, value in self._block_mapping(value, 0)
+                    if key == "timezone"
+                }
+            elif key == "data":
+                schedule["data"] = self._channels(value)
+        return schedule
+
+    def _channels(self, value: str) -> dict:
+        channels = {}
+        for indent, key, channel_value in self._block_mapping(value, 0):
+            if channels:
+                continue  # only the first channel is analyzed
+            channel = channels[key] = {}
+            for key_indent, channel_key, programmes in self._block_mapping(
+                channel_value,
+                indent,
+            ):
+                if channel_key == "programmes":
+                    channel["programmes"] = self._programmes(programmes, key_indent)
+        return channels
+
+    def _programmes(self, value: str, indent: int) -> list[dict]:
+        if value == "[]":
+            return []
+        line = self._peek()
+        if value or line is None or line[0] < indent or line[1][:2] != "- ":
+            self._fail("programme list")
+        programmes = []
+        item_indent = line[0]
+        while line is not None and line[0] == item_indent and line[1][:2] == "- ":
+            # Replace the dash with a space to scan the item as a block mapping
+            body = line[1][2:].lstrip(" ")
+            key_indent = item_indent + len(line[1]) - len(body)
+            self.lines[self.index] = key_indent, body
+            programmes.append(
+                {
+                    key: self._scalar(value, key_indent)
+                    for key, value in self._entries(key_indent)
+                    if key in self.PROGRAMME_KEYS
+                },
+            )
+            line = self._peek()
+        return programmes
+
+    def _block_mapping(
+        self,
+        value: str,
+        parent_indent: int,
+    ) -> Iterator[tuple[int, str, str]]:
+        """Yield the indentation, keys and values of a nested block mapping."""
+        line = self._peek()
+        if value or line is None or line[0] <= parent_indent:
+            self._fail("block mapping")
+        indent = line[0]
+        for key, item_value in self._entries(indent):
+            yield indent, key, item_value
+
+    def _entries(self, indent: int) -> Iterator[tuple[str, str]]:
+        """Yield the keys and unparsed values of a block mapping at ``indent``.
+
+        Values which the consumer doesn't scan further are skipped.
+        """
+        seen = set()
+        while (line := self._peek()) is not None and line[0] >= indent:
+            match = self.KEY_LINE.fullmatch(line[1])
+            if line[0] > indent or match is None or match[1] in seen:
+                self._fail("mapping key")
+            key = match[1]
+            seen.add(key)
+            value = (match[2] or "").rstrip(" ")
+            if value.startswith("#"):
+                value = ""
+            self.index += 1
+            yield key, value
+            self._skip_value(indent, value)
+
+    def _skip_value(self, indent: int, value: str) -> None:
+        """Skip the lines of a value, checking that it doesn't span lines oddly."""
+        first = value[:1]
+        if first and first in "'\"":
+            self._quoted(value)
+        elif first and first in "[{&*!?%@`":
+            self._fail("value")
+        lines = self.lines
+        index = self.index
+        while index < len(lines):
+            line_indent, body = lines[index]
+            if line_indent < indent or (
+                line_indent == indent and (value or body[:2] not in ("- ", "-"))
+            ):
+                break
+            index += 1
+        self.index = index
+
+    def _scalar(self, value: str, indent: int) -> str:
+        """Return a string scalar which must be complete on its line."""
+        if value and value[0] in "'\"":
+            text, rest = self._quoted(value)
+            if rest and not re.match(r"[ \t]+(?:#|$)", rest):
+                self._fail("quoted scalar")
+        else:
+            text = re.split(r"[ \t]#", value, maxsplit=1)[0].rstrip(" \t")
+            if (
+                not text
+                or text[0] in "-?:,[]{}#&*!|>%@`"
+                or re.search(r":(?:[ \t]|$)", text)
+                or any(
+                    pattern.match(text)
+                    for pattern in (
+                        YAML12_BOOL,
+                        YAML12_FLOAT,
+                        YAML12_INT,
+                        YAML12_NULL,
+                        YAML12_TIMESTAMP,
+                    )
+                )
+            ):
+                self._fail("plain scalar")
+        line = self._peek()
+        if line is not None and line[0] > indent:
+            self._fail("multi-line scalar")
+        return text
+
+    def _quoted(self, value: str) -> tuple[str, str]:
+        """Return the text of a quoted scalar and what follows it on the line."""
+        if value[0] == '"':
+            end = value.find('"', 1)
+            if end < 0 or "\\" in value[:end]:
+                self._fail("double-quoted scalar")
+            return value[1:end], value[end + 1 :]
+        end = 1
+        while (end := value.find("'", end)) >= 0 and value[end + 1 : end + 2] == "'":
+            end += 2
+        if end < 0:
+            self._fail("single-quoted scalar")
+        return value[1:end].replace("''", "'"), value[end + 1 :]
+
+    def _peek(self) -> tuple[int, str] | None:
+        """Return the indentation and content of the next non-blank line."""
+        if self.index < len(self.lines):
+            return self.lines[self.index]
+        return None
+
+    def _fail(self, construct: str) -> NoReturn:
+        message = f"unsupported {construct} on line {self.index + 1}"
+        raise ScheduleScanError(message)
+
+
+class ScheduleLoader:
+    """Parses schedule files with one of several backends.
+
+    ``ruamel`` is the ruamel.yaml safe loader, which uses its C extension when
+    ``ruamel.yaml.clib`` is installed. ``pyyaml`` is PyYAML's libyaml-based
+    ``CSafeLoader`` with YAML 1.2 scalar rules. ``scan`` extracts only the fields
+    used by the analysis with `ScheduleScanner` and falls back to the fastest YAML
+    parser for files the scanner doesn't handle. ``json`` and ``msgpack`` read the
+    sidecar files written by ``schedule-analyzer convert`` and parse the YAML file
+    instead if its sidecar is missing or older than it. ``auto`` reads fresh
+    msgpack or JSON sidecars and otherwise scans the YAML file.
+    """
+
+    def __init__(self, backend: str = "auto") -> None:
+        """Create a loader using the named backend."""
+        self.select(backend)
+
+    def select(self, backend: str) -> None:
+        """Switch to the named backend."""
+        if not loader_available(backend):
+            message = f"Schedule loader {backend!r} is not available"
+            raise ValueError(message)
+        self.backend = backend
+        if backend == "auto":
+            self.sidecar_formats = ["json"]
+            if msgpack_available():
+                self.sidecar_formats.insert(0, "msgpack")
+        elif backend in SIDECAR_SUFFIXES:
+            self.sidecar_formats = [backend]
+        else:
+            self.sidecar_formats = []
+        self.scan = backend in ("auto", "scan")
+        self._yaml_backend = backend if backend in YAML_LOADERS else None
+        self._yaml = None
+
+    @property
+    def yaml_backend(self) -> str:
+        """Return the YAML parser used for files which are parsed fully.
+
+        The fastest parser is looked up on first use, since that imports PyYAML.
+        """
+        if self._yaml_backend is None:
+            self._yaml_backend = fastest_yaml_loader()
+        return self._yaml_backend
+
+    def preload(self) -> None:
+        """Import the parser modules the backend always uses.
+
+        Called before starting worker processes, so that forked workers inherit
+        the modules instead of each importing them. The scanning backends import
+        a YAML parser only for files the scanner doesn't handle.
+        """
+        if self.backend == "msgpack":
+            import msgpack  # noqa: F401, PLC0415
+        elif self.backend in YAML_LOADERS:
+            self.parser()
+
+    def parser(self) -> object:
+        """Return the ruamel.yaml or PyYAML loader of the full YAML parser."""
+        if self.yaml_backend == "pyyaml":
+            return pyyaml_loader_class()
+        if self._yaml is None:
+            from ruamel.yaml import YAML  # noqa: PLC0415
+
+            self._yaml = YAML(typ="safe", pure=not ruamel_has_c_parser())
+        return self._yaml
+
+    def load(self, file_path: Path, content: bytes | None = None) -> dict:
+        """Load and parse a schedule file or its sidecar file.
+
+        ``content`` is the content of the YAML file if it has already been read.
+        With the ``scan`` and ``auto`` backends, the result may contain only the
+        fields used by the analysis.
+        """
+        for sidecar_format in self.sidecar_formats:
+            schedule = load_sidecar(file_path, sidecar_format)
+            if schedule is not None:
+                return schedule
+        if content is None:
+            content = file_path.read_bytes()
+        if self.scan:
+            try:
+                return ScheduleScanner(content).scan()
+            except ScheduleScanError as error:
+                logger.debug("Parsing %s fully: %s", file_path, error)
+        return self.parse_yaml(content)
+
+    def load_yaml(self, file_path: Path) -> dict:
+        """Load and parse a schedule YAML file, ignoring any sidecar files."""
+        return self.parse_yaml(file_path.read_bytes())
+
+    def parse_yaml(self, content: bytes) -> dict:
+        """Parse the content of a schedule YAML file."""
+        if self.yaml_backend == "pyyaml":
+            import yaml  # noqa: PLC0415
+
+            return yaml.load(content, Loader=self.parser())  # noqa: S506
+        return self.parser().load(content)
+
+
+def fastest_yaml_loader() -> str:
+    """Return the fastest available YAML backend.
+
+    ruamel.yaml with its C extension is preferred since it is the reference parser,
+    then PyYAML with libyaml, then the pure-Python ruamel.yaml parser.
+    """
+    if not ruamel_has_c_parser() and pyyaml_loader_class() is not None:
+        return "pyyaml"
+    return "ruamel"
+
+
+def sidecar_path(file_path: Path, sidecar_format: str) -> Path:
+    """Return the path of a sidecar file for a schedule YAML file."""
+    return file_path.with_suffix(SIDECAR_SUFFIXES[sidecar_format])
+
+
+def load_sidecar(file_path: Path, sidecar_format: str) -> dict | None:
+    """Load the sidecar file of a schedule file, or None if missing or stale."""
+    sidecar = sidecar_path(file_path, sidecar_format)
+    try:
+        stale = sidecar.stat().st_mtime_ns < file_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if stale:
+        logger.debug("Ignoring stale sidecar file %s", sidecar)
+        return None
+    content = sidecar.read_bytes()
+    if sidecar_format == "msgpack":
+        import msgpack  # noqa: PLC0415
+
+        return msgpack.unpackb(content, strict_map_key=False)
+    return json.loads(content)
+
+
+def write_sidecar(file_path: Path, sidecar_format: str, schedule: dict) -> bool:
+    """Write the sidecar file of a schedule file.
+
+    Returns:
+        False if the schedule contains values the format can't represent exactly,
+        in which case no sidecar file is written
+
+    """
+    if sidecar_format == "msgpack":
+        import msgpack  # noqa: PLC0415
+
+        try:
+            content = msgpack.packb(schedule)
+        except TypeError:
+            return False
+        decoded = msgpack.unpackb(content, strict_map_key=False)
+    else:
+        try:
+            text = json.dumps(schedule, ensure_ascii=False, separators=(",", ":"))
+        except TypeError:
+            return False
+        content = text.encode()
+        decoded = json.loads(text)
+    if decoded != schedule:
+        return False
+    sidecar = sidecar_path(file_path, sidecar_format)
+    temporary = sidecar.with_name(f".{sidecar.name}.tmp")
+    temporary.write_bytes(content)
+    temporary.replace(sidecar)
+    return True
+
+
+schedule_loader = ScheduleLoader()
+
+
+def select_loader(backend: str) -> None:
+    """Select the backend of the shared schedule loader, also in worker processes."""
+    schedule_loader.select(backend)
+
+
+def load_schedule(file_path: Path, content: bytes | None = None) -> dict:
+    """Load and parse a schedule YAML file, or its already read ``content``."""
+    return schedule_loader.load(file_path, content)
+
+
+def extract_timezone(schedule: dict) -> str:
+    """Extract the timezone name from schedule metadata."""
+    return schedule.get("metadata", {}).get("timezone", DEFAULT_TIMEZONE)
+
+
+def extract_program_table(schedule: dict) -> ProgramTable:
+    """Extract the programs of schedule data into a table.
+
+    Gives the same programs as `extract_programs`, without creating datetime
+    objects for the start times.
+    """
+    content = next(iter(schedule.get("data", {}).values()))
+    return ProgramTable.from_start_times(
+        (prog.get("series", prog.get("title", "")), prog["start_time"])
+        for prog in content.get("programmes", [])
+    )
+
+
+class SeriesNormalizer:
+    """Maps raw series titles to series names with alias and pattern rules.
+
+    Titles are stripped of surrounding whitespace and looked up in ``aliases``
+    first. Otherwise the first of the ``patterns`` matching the whole title
+    replaces it with its template, which may refer to groups of the pattern like
+    `re.Match.expand`. The patterns are compiled into one regular expression, so
+    a title is matched against all of them in one pass. Results are memoized for
+    the most recent distinct titles and interned, so that the series names of
+    all programs are shared string objects.
+    """
+
+    def __init__(
+        self,
+        aliases: dict[str, str] | None = None,
+        patterns: list[tuple[str, str]] | None = None,
+        cache_size: int = SERIES_CACHE_SIZE,
+    ) -> None:
+        """Compile the rules for normalizing series titles."""
+        self.aliases = {
+            title.strip(): sys.intern(series)
+            for title, series in {**DEFAULT_SERIES_ALIASES, **(aliases or {})}.items()
+        }
+        self.patterns = list(patterns or [])
+        try:
+            self.compiled = [
+                (re.compile(regex), template) for regex, template in self.patterns
+            ]
+        except re.error as error:
+            message = f"Invalid series pattern: {error}"
+            raise ValueError(message) from error
+        self.combined = combine_patterns([regex for regex, _ in self.patterns])
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Return a short hash of the rules identifying them in saved analyses."""
+        import hashlib  # noqa: PLC0415
+
+        rules = [sorted(self.aliases.items()), self.patterns]
+        return hashlib.sha256(
+            json.dumps(rules, ensure_ascii=False).encode(),
+        ).hexdigest()[:16]
+
+    @classmethod
+    def from_rules(cls, rules: dict, channel: str | None = None) -> SeriesNormalizer:
+        """Create a normalizer from rules returned by `load_series_rules`.
+
+        The aliases and patterns for ``channel`` in the ``channels`` table take
+        precedence over the global ones.
+        """
+        channel_rules = rules.get("channels", {}).get(channel, {})
+        return cls(
+            {**rules.get("aliases", {}), **channel_rules.get("aliases", {})},
+            [*channel_rules.get("patterns", []), *rules.get("patterns", [])],
+        )
+
+    def __call__(self, title: str) -> str:
+        """Return the series name for a raw title."""
+        return self.normalize(title)
+
+    def _normalize(self, title: str) -> str:
+        title = title.strip()
+        series = self.aliases.get(title)
+        if series is not None:
+            return series
+        if self.combined is None:
+            rules = self.compiled
+        else:
+            match = self.combined.fullmatch(title)
+            index = match and int(match.lastgroup.removeprefix("_rule"))
+            rules = [] if match is None else [self.compiled[index]]
+        for regex, template in rules:
+            match = regex.fullmatch(title)
+            if match is not None:
+                return sys.intern(match.expand(template))
+        return sys.intern(title)
+
+
+def combine_patterns(patterns: list[str]) -> re.Pattern | None:
+    """Combine regular expressions into one matching the first of them that does.
+
+    Returns:
+        The combined regular expression with a ``_rule<index>`` group around each
+        pattern, or None if there are no patterns or they can't be combined, e.g.
+        because of numbered backreferences or global flags
+
+    """
+    if not patterns or any(re.search(r"\\[1-9]", regex) for regex in patterns):
+        return None
+    try:
+        return re.compile(
+            "|".join(
+                f"(?P<_rule{index}>{regex})" for index, regex in enumerate(patterns)
+            ),
+        )
+    except re.error:
+        return None
+
+
+def load_series_rules(path: str | Path) -> dict:
+    """Load series normalization rules from a YAML or TOML file.
+
+    The file has an ``aliases`` table mapping exact titles to series names, a
+    ``patterns`` list of tables with a ``match`` regular expression and its
+    ``replace`` template, and a ``channels`` table with the aliases and patterns
+    of channels by the names of their directories.
+
+    Returns:
+        The aliases and patterns as (regular expression, template) tuples, globally
+        and for each channel
+
+    """
+    path = Path(path)
+    content = path.read_bytes()
+    try:
+        if path.suffix == ".toml":
+            import tomllib  # noqa: PLC0415
+
+            config = tomllib.loads(content.decode())
+        else:
+            config = schedule_loader.parse_yaml(content)
+    except Exception as error:
+        message = f"Can't parse series rules in {path}: {error}"
+        raise ValueError(message) from error
+
+    def rule_set(table: object) -> dict:
+        if not isinstance(table, dict):
+            message = f"Series rules in {path} must be tables"
+            raise ValueError(message)  # noqa: TRY004
+        aliases = table.get("aliases") or {}
+        patterns = table.get("patterns") or []
+        if not isinstance(aliases, dict) or not all(
+            isinstance(x, str) for item in aliases.items() for x in item
+        ):
+            message = f"Series aliases in {path} must map titles to names"
+            raise ValueError(message)
+        if not isinstance(patterns, list) or not all(
+            isinstance(pattern, dict)
+            and isinstance(pattern.get("match"), str)
+            and isinstance(pattern.get("replace"), str)
+            for pattern in patterns
+        ):
+            message = f"Series patterns in {path} need match and replace strings"
+            raise ValueError(message)
+        return {
+            "aliases": aliases,
+            "patterns": [(item["match"], item["replace"]) for item in patterns],
+        }
+
+    rules = rule_set(config or {})
+    rules["channels"] = {
+        str(channel): rule_set(table)
+        for channel, table in ((config or {}).get("channels") or {}).items()
+    }
+    return rules
+
+
+series_normalizer = SeriesNormalizer()
+
+
+def normalize_program_name(name: str) -> str:
+    """Normalize program names with the default rules."""
+    return series_normalizer(name)
+
+
+def extract_programs(schedule: dict) -> list[tuple[str, datetime]]:
+    """Extract program entries from schedule data.
+
+    Series titles are returned as they are in the schedule. They are normalized
+    with `SeriesNormalizer` when programs are added to an analysis.
+    """
+    programs = []
+    content = next(iter(schedule.get("data", {}).values()))
+    for prog in content.get("programmes", []):
+        start_time = datetime.fromisoformat(prog["start_time"])
+        programs.append((prog.get("series", prog.get("title", "")), start_time))
+    return programs
+
+
+def decode_datetime(start_time: datetime) -> tuple[int, int]:
+    """Return the seconds since the epoch and the UTC offset in seconds of a time.
+
+    Naive times are taken to be in UTC, and fractions of seconds are dropped.
+    """
+    offset = (start_time.utcoffset() or timedelta(0)) // ONE_SECOND
+    local_seconds = (start_time.replace(tzinfo=None) - EPOCH) // ONE_SECOND
+    return local_seconds - offset, offset
+
+
+class StartTimeDecoder:
+    """Decodes ISO 8601 start times into seconds since the epoch and UTC offsets.
+
+    Start times like ``2024-03-31T21:00:00+03:00`` are split into their date and
+    UTC offset, which are decoded once per distinct pair, and their time of day,
+    which is added as plain integers. The programs of a schedule file share one
+    or two such pairs, or a few more across DST transitions. Other forms accepted
+    by `datetime.fromisoformat` are decoded with it, so the results are always the
+    same as with `decode_datetime`.
+    """
+
+    __slots__ = ("days",)
+
+    def __init__(self) -> None:
+        """Create a decoder with an empty cache of dates and offsets."""
+        # (date and separator, UTC offset) -> (epoch seconds at midnight, offset)
+        self.days: dict[tuple[str, str | None], tuple[int, int]] = {}
+
+    def decode(self, start_time: str) -> tuple[int, int]:
+        """Return the seconds since the epoch and the UTC offset of a start time."""
+        match = START_TIME_PATTERN.fullmatch(start_time)
+        if match is not None:
+            date, hour, minute, second, utc_offset = match.groups()
+            day = self.days.get((date, utc_offset))
+            if day is None:
+                midnight = datetime.fromisoformat(f"{date}00:00:00{utc_offset or ''}")
+                day = self.days[date, utc_offset] = decode_datetime(midnight)
+            hour, minute, second = int(hour), int(minute), int(second)
+            if hour < 24 and minute < 60 and second < 60:  # noqa: PLR2004
+                return day[0] + hour * 3600 + minute * 60 + second, day[1]
+        return decode_datetime(datetime.fromisoformat(start_time))
+
+
+class ProgramTable:
+    """Programs of one schedule file stored as columns of integers.
+
+    Series names are interned and referenced by their index in ``series`` from
+    the ``series_ids`` column. Start times are stored as seconds since the Unix
+    epoch together with their UTC offsets in seconds, and the local date ordinal,
+    weekday and second of day are derived from those once. Fractions of seconds
+    in start times are dropped.
+    """
+
+    __slots__ = (
+        "date_ordinals",
+        "epoch_seconds",
+        "seconds_of_day",
+        "series",
+        "series_ids",
+        "utc_offsets",
+        "weekdays",
+    )
+
+    def __init__(
+        self,
+        series: list[str],
+        series_ids: array,
+        epoch_seconds: array,
+        utc_offsets: array,
+    ) -> None:
+        """Create a table from series names and the columns of programs."""
+        self.series = [sys.intern(name) for name in series]
+        self.series_ids = series_ids
+        self.epoch_seconds = epoch_seconds
+        self.utc_offsets = utc_offsets
+        self.date_ordinals = array("i")
+        self.weekdays = array("b")
+        self.seconds_of_day = array("i")
+        for epoch, offset in zip(epoch_seconds, utc_offsets, strict=True):
+            days, second = divmod(epoch + offset, SECONDS_PER_DAY)
+            self.date_ordinals.append(days + EPOCH_ORDINAL)
+            self.weekdays.append((days + EPOCH_WEEKDAY) % 7)
+            self.seconds_of_day.append(second)
+
+    @classmethod
+    def from_programs(cls, programs: list[tuple[str, datetime]]) -> ProgramTable:
+        """Create a table from (series, start time) tuples."""
+        return cls.from_epoch_seconds(
+            (series, *decode_datetime(start_time)) for series, start_time in programs
+        )
+
+    @classmethod
+    def from_start_times(cls, programs: Iterable[tuple[str, str]]) -> ProgramTable:
+        """Create a table from (series, ISO 8601 start time string) tuples.
+
+        The start times are decoded with a `StartTimeDecoder` without creating
+        datetime objects.
+        """
+        decode = StartTimeDecoder().decode
+        return cls.from_epoch_seconds(
+            (series, *decode(start_time)) for series, start_time in programs
+        )
+
+    @classmethod
+    def from_epoch_seconds(
+        cls,
+        programs: Iterable[tuple[str, int, int]],
+    ) -> ProgramTable:
+        """Create a table from (series, epoch seconds, UTC offset) tuples."""
+        series_index: dict[str, int] = {}
+        series_ids = array("i")
+        epoch_seconds = array("q")
+        utc_offsets = array("i")
+        for series, epoch, offset in programs:
+            series_ids.append(series_index.setdefault(series, len(series_index)))
+            epoch_seconds.append(epoch)
+            utc_offsets.append(offset)
+        return cls(list(series_index), series_ids, epoch_seconds, utc_offsets)
+
+    def __len__(self) -> int:
+        """Return the number of programs in the table."""
+        return len(self.series_ids)
+
+    def programs(self) -> list[tuple[str, datetime]]:
+        """Return the programs as (series, timezone-aware start time) tuples."""
+        return [
+            (
+                self.series[series_id],
+                datetime.fromtimestamp(epoch, timezone(timedelta(seconds=offset))),
+            )
+            for series_id, epoch, offset in zip(
+                self.series_ids,
+                self.epoch_seconds,
+                self.utc_offsets,
+                strict=True,
+            )
+        ]
+
+
+class ScheduleCache:
+    """On-disk SQLite cache of programs extracted from schedule files.
+
+    Entries are keyed by the resolved file path and validated against the file's
+    modification time and size. When ``verify_hash`` is set, an entry whose stat
+    data no longer matches is still accepted if the SHA-256 digest of the file
+    content is unchanged, which keeps the cache warm across fresh checkouts.
+    Digests are only computed when ``verify_hash`` is set.
+
+    The database may be shared by runs for different channels, also at the same
+    time. Writes are committed in batches of `CACHE_COMMIT_BATCH`, so that other
+    runs aren't locked out of the database for long.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        *,
+        verify_hash: bool = False,
+        rebuild: bool = False,
+    ) -> None:
+        """Open or create the cache database in ``cache_dir``."""
+        import sqlite3  # noqa: PLC0415
+
+        cache_path = Path(cache_dir)
+        cache_path.mkdir(parents=True, exist_ok=True)
+        self.verify_hash = verify_hash
+        self.hits = 0
+        self.misses = 0
+        self.pending_writes = 0
+        self.connection = sqlite3.connect(cache_path / CACHE_FILENAME)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if rebuild or version != CACHE_SCHEMA_VERSION:
+            logger.debug("Rebuilding schedule cache in %s", cache_path)
+            self.connection.execute("DROP TABLE IF EXISTS programs")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS programs ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " timezone TEXT NOT NULL,"
+            " series TEXT NOT NULL,"
+            " series_ids BLOB NOT NULL,"
+            " epoch_seconds BLOB NOT NULL,"
+            " utc_offsets BLOB NOT NULL)",
+        )
+        self.connection.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+        self.connection.commit()
+
+    def __enter__(self) -> Self:
+        """Return the cache itself for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Commit pending writes and close the database."""
+        self.close()
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self.commit()
+        self.connection.close()
+
+    def commit(self) -> None:
+        """Commit pending writes."""
+        self.connection.commit()
+        self.pending_writes = 0
+
+    def _wrote(self) -> None:
+        """Count a write, committing once a batch of writes is pending."""
+        self.pending_writes += 1
+        if self.pending_writes >= CACHE_COMMIT_BATCH:
+            self.commit()
+
+    def get(self, file_path: Path) -> tuple[str, ProgramTable] | None:
+        """Return the cached timezone and programs for a file, or None if stale."""
+        key = str(file_path.resolve())
+        row = self.connection.execute(
+            "SELECT mtime_ns, size, digest, timezone,"
+            " series, series_ids, epoch_seconds, utc_offsets"
+            " FROM programs WHERE path = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        mtime_ns, size, digest, tz_name, *columns = row
+        stat = file_path.stat()
+        if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+            if not self.verify_hash or file_digest(file_path) != digest:
+                self.misses += 1
+                return None
+            self.connection.execute(
+                "UPDATE programs SET mtime_ns = ?, size = ? WHERE path = ?",
+                (stat.st_mtime_ns, stat.st_size, key),
+            )
+            self._wrote()
+        self.hits += 1
+        series, series_ids, epoch_seconds, utc_offsets = columns
+        return tz_name, ProgramTable(
+            json.loads(series),
+            array("i", series_ids),
+            array("q", epoch_seconds),
+            array("i", utc_offsets),
+        )
+
+    def put(self, file_path: Path, tz_name: str, programs: ProgramTable) -> None:
+        """Store the timezone and extracted programs of a file."""
+        stat = file_path.stat()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO programs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(file_path.resolve()),
+                stat.st_mtime_ns,
+                stat.st_size,
+                file_digest(file_path) if self.verify_hash else "",
+                tz_name,
+                json.dumps(programs.series, ensure_ascii=False),
+                programs.series_ids.tobytes(),
+                programs.epoch_seconds.tobytes(),
+                programs.utc_offsets.tobytes(),
+            ),
+        )
+        self._wrote()
+
+    def evict(self, keep: Iterable[Path], roots: Iterable[str | Path]) -> int:
+        """Remove entries for files under ``roots`` which are not in ``keep``.
+
+        Entries of files under other directories are kept, since they may belong
+        to other channels sharing the cache.
+
+        Returns:
+            The number of entries removed
+
+        """
+        keep_keys = {str(path.resolve()) for path in keep}
+        prefixes = tuple(f"{Path(root).resolve()}{os.sep}" for root in roots)
+        stale = [
+            (path,)
+            for (path,) in self.connection.execute("SELECT path FROM programs")
+            if path.startswith(prefixes) and path not in keep_keys
+        ]
+        self.connection.executemany("DELETE FROM programs WHERE path = ?", stale)
+        self.commit()
+        logger.debug("Evicted %d stale cache entries", len(stale))
+        return len(stale)
+
+
+def file_digest(file_path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    import hashlib  # noqa: PLC0415
+
+    with file_path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ScheduleArchive:
+    """The schedule files of a channel packed into one memory-mapped file.
+
+    The archive starts with a header pointing to an index of day records by date.
+    Each record holds the timezone and the `ProgramTable` columns of one schedule
+    file, along with the modification time and size of the file it was packed
+    from. Columns are aligned and stored in native byte order, so loading a day
+    returns memory views into the mapped file instead of copies.
+
+    `pack_schedule_files` appends records and a new index, and then updates the
+    index offset in the header, so existing records are never rewritten and
+    readers never see a partially written index.
+
+    Schedule files added after the newest packed day are listed along with the
+    packed ones, and a packed day whose file has changed since it was packed is
+    parsed from the file instead, so the archive never hides newer data.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Map an archive file and read its index."""
+        import mmap  # noqa: PLC0415
+
+        self.path = path
+        with path.open("rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byteorder, index_offset = ARCHIVE_HEADER.unpack_from(
+            self.mmap,
+        )
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            message = f"{path} is not a version {ARCHIVE_VERSION} schedule archive"
+            raise ValueError(message)
+        if byteorder != ARCHIVE_BYTEORDERS[sys.byteorder]:
+            message = f"{path} was packed on a machine with another byte order"
+            raise ValueError(message)
+        # date ordinal -> (record offset, record length, file mtime_ns, file size)
+        self.index: dict[int, tuple[int, int, int, int]] = {}
+        if index_offset:
+            (count,) = ARCHIVE_COUNT.unpack_from(self.mmap, index_offset)
+            start = index_offset + ARCHIVE_COUNT.size
+            entries = self.mmap[start : start + count * ARCHIVE_INDEX_ENTRY.size]
+            for ordinal, *entry in ARCHIVE_INDEX_ENTRY.iter_unpack(entries):
+                self.index[ordinal] = tuple(entry)
+        self.ordinals = sorted(self.index)
+
+    def find_files(
+        self,
+        root: Path,
+        weeks: int = 4,
+        *,
+        since: datetime.date | None = None,
+        until: datetime.date | None = None,
+    ) -> list[Path]:
+        """Return the paths of the files in the time window, newest first.
+
+        The packed days are listed along with the schedule files after the newest
+        packed day. The window is chosen like in `find_schedule_files`.
+        """
+        newest = self.ordinals[-1] if self.ordinals else 0
+        newer = []
+        for file_path in iter_schedule_files(root):
+            ordinal = schedule_file_date(file_path).toordinal()
+            if ordinal <= newest:
+                break
+            newer.append(ordinal)
+        ordinals = self.ordinals + newer[::-1]
+        end = bisect_right(ordinals, until.toordinal()) if until else len(ordinals)
+        if not end:
+            return []
+        latest = datetime.fromordinal(ordinals[end - 1]).replace(tzinfo=timezone.utc)
+        start = bisect_left(ordinals, window_start(latest, weeks, since).toordinal())
+        return [
+            root / f"{day:%Y}" / f"{day:%m}" / f"{day:%d}.yaml"
+            for day in map(datetime.fromordinal, reversed(ordinals[start:end]))
+        ]
+
+    def stamp(self, file_path: Path) -> tuple[int, int] | None:
+        """Return the modification time and size of a packed file, or None."""
+        entry = self.index.get(schedule_file_date(file_path).toordinal())
+        return None if entry is None else entry[2:]
+
+    def is_fresh(self, file_path: Path) -> bool:
+        """Return whether a file is packed and unchanged or removed since then."""
+        stamp = self.stamp(file_path)
+        if stamp is None:
+            return False
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return True
+        return (stat.st_mtime_ns, stat.st_size) == stamp
+
+    def load(self, file_path: Path) -> tuple[str, ProgramTable] | None:
+        """Return the timezone and programs of a packed file, or None.
+
+        None is also returned if the file has changed since it was packed.
+        """
+        if not self.is_fresh(file_path):
+            return None
+        entry = self.index[schedule_file_date(file_path).toordinal()]
+        offset, length = entry[:2]
+        record = memoryview(self.mmap)[offset : offset + length]
+        tz_length, series_length, count = ARCHIVE_RECORD.unpack_from(record)
+        position = ARCHIVE_RECORD.size
+        tz_name = str(record[position : position + tz_length], "utf-8")
+        position += tz_length
+        series = json.loads(bytes(record[position : position + series_length]))
+        position = aligned(position + series_length)
+        columns = []
+        for typecode in "qii":  # epoch_seconds, series_ids, utc_offsets
+            size = count * array(typecode).itemsize
+            columns.append(record[position : position + size].cast(typecode))
+            position = aligned(position + size)
+        epoch_seconds, series_ids, utc_offsets = columns
+        return tz_name, ProgramTable(series, series_ids, epoch_seconds, utc_offsets)
+
+
+def aligned(offset: int) -> int:
+    """Round an offset up to the alignment of archive records and columns."""
+    return -(-offset // ARCHIVE_ALIGNMENT) * ARCHIVE_ALIGNMENT
+
+
+# Open archives by the resolved paths of their channel directories, with the
+# stamps of the archive files
+archives: dict[Path, tuple[tuple[int, int], ScheduleArchive]] = {}
+
+
+@cache
+def resolved_directory(directory: str) -> Path:
+    """Return the resolved path of an absolute directory path."""
+    return Path(directory).resolve()
+
+
+def open_archive(root_dir: str | Path) -> ScheduleArchive | None:
+    """Open the archive of a channel directory if it has one.
+
+    An archive already open is reused unless the file has changed since.
+    """
+    root = resolved_directory(os.path.abspath(root_dir))  # noqa: PTH100
+    path = root / ARCHIVE_FILENAME
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        archives.pop(root, None)
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if root not in archives or archives[root][0] != stamp:
+        logger.debug("Opening schedule archive %s", path)
+        archives[root] = stamp, ScheduleArchive(path)
+    return archives[root][1]
+
+
+def channel_archive(file_path: Path) -> ScheduleArchive | None:
+    """Open the archive of the channel of a ``YYYY/MM/DD.yaml`` file, if any."""
+    return open_archive(file_path.parent.parent.parent)
+
+
+def file_stamp(file_path: Path) -> list[int]:
+    """Return the modification time and size of a schedule file.
+
+    Packed files which have been removed have the stamps they had when they were
+    packed.
+    """
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        archive = channel_archive(file_path)
+        stamp = None if archive is None else archive.stamp(file_path)
+        if stamp is None:
+            raise
+        return list(stamp)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def pack_schedule_files(root_dir: str | Path) -> tuple[int, int]:
+    """Append the new and changed schedule files under a directory to its archive.
+
+    The archive is created if it doesn't exist. Records of changed files replace
+    the old ones in the index, but are appended like new ones.
+
+    Returns:
+        The numbers of packed files and of files which were already up to date
+
+    """
+    root = Path(root_dir)
+    path = root / ARCHIVE_FILENAME
+    if not path.exists():
+        path.write_bytes(
+            ARCHIVE_HEADER.pack(
+                ARCHIVE_MAGIC,
+                ARCHIVE_VERSION,
+                ARCHIVE_BYTEORDERS[sys.byteorder],
+                0,
+            ),
+        )
+    archive = ScheduleArchive(path)
+    index = dict(archive.index)
+    archive.mmap.close()
+    packed = unchanged = 0
+    with path.open("r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        for file_path in sorted(iter_schedule_files(root)):
+            ordinal = schedule_file_date(file_path).toordinal()
+            stat = file_path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if index.get(ordinal, (None,) * 4)[2:] == stamp:
+                unchanged += 1
+                continue
+            tz_name, programs = parse_day(file_path)
+            record = archive_record(tz_name, programs)
+            offset = aligned(end)
+            f.write(bytes(offset - end))
+            f.write(record)
+            end = offset + len(record)
+            index[ordinal] = offset, len(record), *stamp
+            packed += 1
+        if not packed:
+            return packed, unchanged
+        index_offset = aligned(end)
+        f.write(bytes(index_offset - end))
+        f.write(ARCHIVE_COUNT.pack(len(index)))
+        for ordinal, entry in sorted(index.items()):
+            f.write(ARCHIVE_INDEX_ENTRY.pack(ordinal, *entry))
+        f.flush()
+        os.fsync(f.fileno())
+        # Point the header to the new index only after it has been written
+        f.seek(0)
+        f.write(
+            ARCHIVE_HEADER.pack(
+                ARCHIVE_MAGIC,
+                ARCHIVE_VERSION,
+                ARCHIVE_BYTEORDERS[sys.byteorder],
+                index_offset,
+            ),
+        )
+    return packed, unchanged
+
+
+def archive_record(tz_name: str, programs: ProgramTable) -> bytes:
+    """Encode the timezone and programs of a schedule file as an archive record."""
+    tz_bytes = tz_name.encode()
+    series_bytes = json.dumps(programs.series, ensure_ascii=False).encode()
+    record = bytearray(
+        ARCHIVE_RECORD.pack(len(tz_bytes), len(series_bytes), len(programs)),
+    )
+    record += tz_bytes + series_bytes
+    for column in (programs.epoch_seconds, programs.series_ids, programs.utc_offsets):
+        record += bytes(aligned(len(record)) - len(record))
+        record += column.tobytes()
+    return bytes(record)
+
+
+def archived_day(file_path: Path) -> tuple[str, ProgramTable] | None:
+    """Return the timezone and programs of a file from its channel's archive, if any."""
+    archive = channel_archive(file_path)
+    return None if archive is None else archive.load(file_path)
+
+
+def load_day(
+    file_path: Path,
+    cache: ScheduleCache | None = None,
+) -> tuple[str, ProgramTable]:
+    """Load the timezone and programs of one schedule file, using the cache.
+
+    Files in the archive of their channel are loaded from the archive.
+    """
+    archived = archived_day(file_path)
+    if archived is not None:
+        return archived
+    if cache is not None:
+        cached = cache.get(file_path)
+        if cached is not None:
+            return cached
+    tz_name, programs = parse_day(file_path)
+    if cache is not None:
+        cache.put(file_path, tz_name, programs)
+    return tz_name, programs
+
+
+def parse_day(
+    file_path: Path,
+    content: bytes | None = None,
+) -> tuple[str, ProgramTable]:
+    """Parse the timezone and programs of one schedule file.
+
+    ``content`` is the content of the file if it has already been read.
+    """
+    schedule = load_schedule(file_path, content)
+    return extract_timezone(schedule), extract_program_table(schedule)
+
+
+class ReadAhead:
+    """Reads files in background threads ahead of their use.
+
+    Up to ``depth`` files are read at the same time, and another read isn't
+    started while the files being read and the ones read but not yet used would
+    take more than ``memory_cap`` bytes with it. The size of each file is checked
+    before reading it. At least one file is always read, however large.
+    """
+
+    def __init__(
+        self,
+        depth: int = READ_AHEAD_DEPTH,
+        memory_cap: int = READ_AHEAD_MEMORY_MIB << 20,
+    ) -> None:
+        """Create a reader with the given read-ahead depth and memory cap."""
+        self.depth = depth
+        self.memory_cap = memory_cap
+
+    def read(self, paths: Iterable[Path]) -> Iterator[tuple[Path, bytes]]:
+        """Yield the path and content of each file in the order of ``paths``."""
+        from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+        sized = ((path, path.stat().st_size) for path in paths)
+        upcoming = next(sized, None)
+        pending = deque()
+        buffered = 0
+        with ThreadPoolExecutor(self.depth, thread_name_prefix="read-ahead") as pool:
+            while pending or upcoming is not None:
+                while upcoming is not None and len(pending) < self.depth:
+                    path, size = upcoming
+                    if pending and buffered + size > self.memory_cap:
+                        break
+                    pending.append((path, size, pool.submit(path.read_bytes)))
+                    buffered += size
+                    upcoming = next(sized, None)
+                path, size, future = pending.popleft()
+                buffered -= size
+                yield path, future.result()
+
+
+# Disabled unless enabled with select_read_ahead, like the command line does
+read_ahead = ReadAhead(depth=0)
+
+
+def select_read_ahead(depth: int, memory_mib: int) -> None:
+    """Set the read-ahead depth and memory cap of the shared file reader."""
+    read_ahead.depth = depth
+    read_ahead.memory_cap = memory_mib << 20
+
+
+def load_days(
+    files: list[Path],
+    cache: ScheduleCache | None = None,
+    jobs: int = 1,
+) -> Iterator[tuple[Path, ProgramTable]]:
+    """Yield the programs of each schedule file in the order of ``files``.
+
+    Files missing from the cache are parsed in this process while the shared
+    `ReadAhead` reader reads the next ones in the background, or with ``jobs``
+    greater than one, in a pool of worker processes. Results are still yielded
+    in file order.
+    """
+    if jobs <= 1 and read_ahead.depth <= 0:
+        for file_path in files:
+            yield file_path, load_day(file_path, cache)[1]
+        if cache is not None:
+            cache.commit()
+        return
 
-logger = logging.getLogger(__name__)
+    cached = {}
+    for file_path in files:
+        cached_day = archived_day(file_path)
+        if cached_day is None and cache is not None:
+            cached_day = cache.get(file_path)
+        if cached_day is not None:
+            cached[file_path] = cached_day[1]
+    missing = [file_path for file_path in files if file_path not in cached]
+    if jobs <= 1:
+        logger.debug(
+            "Parsing %d files, reading up to %d ahead",
+            len(missing),
+            read_ahead.depth,
+        )
+        parsed = (
+            parse_day(file_path, content)
+            for file_path, content in read_ahead.read(missing)
+        )
+        yield from merge_parsed_days(files, cached, parsed, cache)
+        return
 
+    logger.debug("Parsing %d files with %d worker processes", len(missing), jobs)
+    from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415
 
-def setup_logging(*, debug: bool = False) -> None:
-    """Configure logging with optional debug level."""
-    logging.basicConfig(
-        level=logging.DEBUG if debug else logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    schedule_loader.preload()
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=select_loader,
+        initargs=(schedule_loader.backend,),
+    ) as pool:
+        parsed = pool.map(
+            parse_day,
+            missing,
+            chunksize=max(1, len(missing) // (jobs * 4)),
+        )
+        yield from merge_parsed_days(files, cached, parsed, cache)
 
 
-def parse_args() -> argparse.Namespace:
-    """Parse command line arguments.
+def merge_parsed_days(
+    files: list[Path],
+    cached: dict[Path, ProgramTable],
+    parsed: Iterator[tuple[str, ProgramTable]],
+    cache: ScheduleCache | None,
+) -> Iterator[tuple[Path, ProgramTable]]:
+    """Yield cached and newly parsed programs in the order of ``files``.
+
+    ``parsed`` holds the results of the files missing from ``cached`` in order,
+    and they are stored in the cache.
+    """
+    for file_path in files:
+        if file_path in cached:
+            yield file_path, cached[file_path]
+            continue
+        tz_name, programs = next(parsed)
+        if cache is not None:
+            cache.put(file_path, tz_name, programs)
+        yield file_path, programs
+    if cache is not None:
+        cache.commit()
 
-    Returns:
-        Parsed command line arguments
 
+class TimeSlot:
+    """A time range in which a series airs on one weekday, with its air dates.
+
+    ``earliest`` and ``latest`` are start times as seconds from midnight UTC,
+    so that times with different UTC offsets compare correctly, and
+    ``earliest_offset`` and ``latest_offset`` are the UTC offsets they had.
+    Since all dates of a slot fall on the same weekday, they are stored as a
+    bitset ``weeks`` in which bit ``i`` stands for the date ordinal
+    ``first_date + 7 * i``.
     """
-    parser = argparse.ArgumentParser(
-        description="Analyze recurring programs from schedule YAML files",
-    )
-    parser.add_argument(
-        "-d",
-        "--directory",
-        required=True,
-        help="Root directory containing YYYY/MM/DD.yml schedule files",
-    )
-    parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Enable debug logging",
-    )
-    parser.add_argument(
-        "-f",
-        "--format",
-        choices=["text", "html"],
-        default="text",
-        help="Output format (text or html)",
+
+    __slots__ = (
+        "earliest",
+        "earliest_offset",
+        "first_date",
+        "latest",
+        "latest_offset",
+        "weeks",
     )
-    return parser.parse_args()
 
+    def __init__(
+        self,
+        start: int,
+        utc_offset: int,
+        first_date: int,
+        weeks: int = 1,
+    ) -> None:
+        """Create a slot covering a single start time on the dates of ``weeks``."""
+        self.earliest = self.latest = start
+        self.earliest_offset = self.latest_offset = utc_offset
+        self.first_date = first_date
+        self.weeks = weeks
 
-def find_schedule_files(root_dir: str, weeks: int = 4) -> list[Path]:
-    """Find all relevant YAML files from newest to oldest within time window."""
-    root = Path(root_dir)
-    logger.debug("Searching in: %s", root)
+    def __len__(self) -> int:
+        """Return the number of dates in the slot."""
+        return self.weeks.bit_count()
 
-    log_directory_contents(root)
+    def add_weeks(self, first_date: int, weeks: int) -> None:
+        """Add the dates of a bitset of weeks starting on ``first_date``."""
+        shift = (first_date - self.first_date) // 7
+        if shift < 0:
+            self.weeks <<= -shift
+            self.first_date = first_date
+            shift = 0
+        self.weeks |= weeks << shift
 
-    files = []
-    logger.debug("Looking for year directories matching: [0-9][0-9][0-9][0-9]")
-    year_dirs = sorted(root.glob("[0-9][0-9][0-9][0-9]"), reverse=True)
-    for year_dir in year_dirs:
-        year = int(year_dir.name)
-        logger.debug("Found year directory: %s", year_dir.name)
+    def remove_dates(self, date_ordinals: Iterable[int]) -> None:
+        """Remove dates from the slot, leaving ``weeks`` zero if none remain."""
+        for date_ordinal in date_ordinals:
+            week, remainder = divmod(date_ordinal - self.first_date, 7)
+            if week >= 0 and not remainder:
+                self.weeks &= ~(1 << week)
+        if self.weeks:
+            empty_weeks = (self.weeks & -self.weeks).bit_length() - 1
+            self.weeks >>= empty_weeks
+            self.first_date += 7 * empty_weeks
+
+    def date_ordinals(self) -> Iterator[int]:
+        """Yield the ordinals of the dates in the slot in ascending order."""
+        weeks = self.weeks
+        date_ordinal = self.first_date
+        while weeks:
+            if weeks & 1:
+                yield date_ordinal
+            weeks >>= 1
+            date_ordinal += 7
+
+    def display_time(self) -> tuple[int, int]:
+        """Return the hour and minute of the middle of the slot's time range.
+
+        The time is in the UTC offset of the earliest start time.
+        """
+        local_time = (
+            self.earliest + self.earliest_offset + (self.latest - self.earliest) // 2
+        ) % SECONDS_PER_DAY
+        return local_time // 3600, local_time // 60 % 60
+
+
+class SlotIndex:
+    """Time slots of one series on one weekday.
+
+    Each distinct start time and UTC offset is kept in ``start_times`` as a slot
+    of its own with the dates it aired on. The time slots are the runs of those
+    start times, in ascending order, in which each time is within ``tolerance``
+    of the previous one. They only depend on which programs were added and not
+    on the order of adding them, so removing the dates of a schedule file gives
+    the same slots as never adding the file.
+    """
+
+    __slots__ = ("_keys", "_slots", "comparisons", "start_times", "tolerance")
+
+    def __init__(self, tolerance: timedelta) -> None:
+        """Create an empty index grouping start times within ``tolerance``."""
+        self.tolerance = tolerance // ONE_SECOND
+        self.start_times: dict[tuple[int, int], TimeSlot] = {}
+        self._keys: list[tuple[int, int]] = []  # sorted keys of ``start_times``
+        self._slots: list[TimeSlot] | None = None
+        self.comparisons = 0
+
+    def add(
+        self,
+        start: int,
+        utc_offset: int,
+        first_date: int,
+        weeks: int = 1,
+    ) -> None:
+        """Add a start time on the date ``first_date``, or on the dates of ``weeks``.
+
+        ``start`` is in seconds from midnight UTC, see `TimeSlot`.
+        """
+        key = (start, utc_offset)
+        start_time = self.start_times.get(key)
+        if start_time is None:
+            self.start_times[key] = TimeSlot(start, utc_offset, first_date, weeks)
+            insort(self._keys, key)
+        else:
+            start_time.add_weeks(first_date, weeks)
+        self._slots = None
+
+    def remove_dates(self, date_ordinals: list[int]) -> None:
+        """Remove dates from all start times, dropping those left without dates."""
+        for key, start_time in list(self.start_times.items()):
+            start_time.remove_dates(date_ordinals)
+            if not start_time.weeks:
+                del self.start_times[key]
+        if len(self._keys) != len(self.start_times):
+            self._keys = sorted(self.start_times)
+        self._slots = None
+
+    @property
+    def slots(self) -> list[TimeSlot]:
+        """Return the time slots in ascending order of time."""
+        if self._slots is None:
+            self._slots = []
+            slot = None
+            for key in self._keys:
+                start_time = self.start_times[key]
+                if slot is not None:
+                    self.comparisons += 1
+                    if start_time.earliest - slot.latest <= self.tolerance:
+                        slot.latest = start_time.latest
+                        slot.latest_offset = start_time.latest_offset
+                        slot.add_weeks(start_time.first_date, start_time.weeks)
+                        continue
+                slot = TimeSlot(
+                    start_time.earliest,
+                    start_time.earliest_offset,
+                    start_time.first_date,
+                    start_time.weeks,
+                )
+                self._slots.append(slot)
+        return self._slots
+
+
+class RecurringAnalysis:
+    """Time slots of all series and weekdays, and the files they were built from.
 
+    `update_files` folds new and changed schedule files into the slots and removes
+    the dates of files no longer analyzed. The state can be saved as JSON and
+    loaded again to continue updating the analysis in a later run.
+    """
+
+    def __init__(self, normalizer: SeriesNormalizer | None = None) -> None:
+        """Create an empty analysis normalizing series titles with ``normalizer``."""
+        self.normalizer = normalizer or series_normalizer
+        self.occurrences: dict[tuple[str, int], SlotIndex] = {}
+        self.files: dict[str, list[int]] = {}  # path -> [mtime_ns, size]
+        self.file_dates: dict[str, list[int]] = {}  # path -> program date ordinals
+
+    def add_programs(
+        self,
+        programs: ProgramTable | list[tuple[str, datetime]],
+        date_ordinals: Container[int] | None = None,
+    ) -> None:
+        """Add each program start time to the slots of its series and weekday.
+
+        With ``date_ordinals``, only the programs on those dates are added.
+        """
+        if not isinstance(programs, ProgramTable):
+            programs = ProgramTable.from_programs(programs)
+        if logger.isEnabledFor(logging.DEBUG):
+            for series, start_time in programs.programs():
+                logger.debug("  Found program: %s at %s", series, start_time)
+        normalize = self.normalizer.normalize
+        series_names = [normalize(name) for name in programs.series]
+        occurrences = self.occurrences
+        for series_id, weekday, second, offset, date_ordinal in zip(
+            programs.series_ids,
+            programs.weekdays,
+            programs.seconds_of_day,
+            programs.utc_offsets,
+            programs.date_ordinals,
+            strict=True,
+        ):
+            if date_ordinals is not None and date_ordinal not in date_ordinals:
+                continue
+            key = (series_names[series_id], weekday)
+            slot_index = occurrences.get(key)
+            if slot_index is None:
+                slot_index = occurrences[key] = SlotIndex(SLOT_TOLERANCE)
+            # Compare times of day as seconds from midnight UTC
+            slot_index.add(second - offset, offset, date_ordinal)
+
+    def add_files(
+        self,
+        files: list[Path],
+        cache: ScheduleCache | None = None,
+        jobs: int = 1,
+    ) -> None:
+        """Add the programs of schedule files."""
+        fold_days(load_days(files, cache, jobs), lambda _file_path: self)
+
+    def update_files(
+        self,
+        files: list[Path],
+        cache: ScheduleCache | None = None,
+        jobs: int = 1,
+    ) -> None:
+        """Fold new and changed ``files`` into the slots and drop other files.
+
+        The dates of the programs in new, changed and dropped files are removed
+        from the slots, and the programs on those dates are added again from the
+        new and changed files and the unchanged ones having programs on the same
+        dates. Only those files are loaded, and the result is identical to a new
+        analysis of ``files``.
+        """
+        paths = {str(file_path.resolve()): file_path for file_path in files}
+        stamps = {key: file_stamp(file_path) for key, file_path in paths.items()}
+        changed = [key for key, stamp in stamps.items() if self.files.get(key) != stamp]
+        dropped = [key for key in self.files if key not in stamps]
+        if not changed and not dropped:
+            return
+        modified = sum(key in self.files for key in changed)
+        if modified:
+            logger.info("%d schedule files have changed, loading them again", modified)
+        dates: set[int] = set()
+        for key in [*changed, *dropped]:
+            dates.update(self.file_dates.pop(key, ()))
+        keys = {file_path: key for key, file_path in paths.items()}
+        days = {}
+        with profiler.stage("loading"):
+            for file_path, programs in load_days(
+                [paths[key] for key in changed],
+                cache,
+                jobs,
+            ):
+                key = keys[file_path]
+                days[key] = programs
+                self.file_dates[key] = sorted(set(programs.date_ordinals))
+                dates.update(self.file_dates[key])
+            neighbours = [
+                paths[key]
+                for key in stamps
+                if key not in days and not dates.isdisjoint(self.file_dates[key])
+            ]
+            for file_path, programs in load_days(neighbours, cache, jobs):
+                days[keys[file_path]] = programs
         logger.debug(
-            "Looking for month directories in %s matching: [0-9][0-9]",
-            year_dir.name,
+            "Updating %d dates from %d new or changed and %d unchanged files",
+            len(dates),
+            len(changed),
+            len(neighbours),
         )
-        month_dirs = sorted(year_dir.glob("[0-9][0-9]"), reverse=True)
-        for month_dir in month_dirs:
-            month = int(month_dir.name)
-            logger.debug("Found month directory: %s/%s", year_dir.name, month_dir.name)
+        profiler.count("files_loaded", len(days))
+        with profiler.stage("matching"):
+            self.remove_dates(dates)
+            for programs in days.values():
+                profiler.count("programs", len(programs))
+                self.add_programs(programs, dates)
+        self.files = stamps
 
-            log_directory_contents(month_dir)
+    def remove_dates(self, date_ordinals: Iterable[int]) -> None:
+        """Remove dates from all slots, and the slots left without dates."""
+        weekday_dates = defaultdict(list)
+        for date_ordinal in date_ordinals:
+            weekday = (date_ordinal - EPOCH_ORDINAL + EPOCH_WEEKDAY) % 7
+            weekday_dates[weekday].append(date_ordinal)
+        for key, slot_index in list(self.occurrences.items()):
+            if key[1] in weekday_dates:
+                slot_index.remove_dates(weekday_dates[key[1]])
+                if not slot_index.start_times:
+                    del self.occurrences[key]
 
-            logger.debug(
-                "Looking for day files in %s/%s matching: [0-9][0-9].yaml",
-                year_dir.name,
-                month_dir.name,
-            )
-            day_files = sorted(month_dir.glob("[0-9][0-9].yaml"), reverse=True)
-            for day_file in day_files:
-                day = int(day_file.stem)
-                date = datetime(year, month, day, tzinfo=timezone.utc)
-                if not files:  # First file found
-                    latest_date = date
-                    # Calculate initial cutoff date
-                    cutoff = min(
-                        datetime.now(tz=timezone.utc),
-                        latest_date - timedelta(weeks=weeks),
-                    )
-                    # Adjust to previous Monday if needed
-                    days_since_monday = cutoff.weekday()
-                    if days_since_monday > 0:  # If not already Monday
-                        cutoff -= timedelta(days=days_since_monday)
+    def stats(self) -> dict[str, int]:
+        """Return the numbers of series and weekdays, slots and slot comparisons."""
+        return {
+            "series_weekdays": len(self.occurrences),
+            "slots": sum(len(index.slots) for index in self.occurrences.values()),
+            "slot_comparisons": sum(
+                index.comparisons for index in self.occurrences.values()
+            ),
+        }
+
+    def recurring(
+        self,
+        min_occurrences: int = 2,
+    ) -> list[tuple[int, int, int, str, set[datetime.date]]]:
+        """Return slots with at least ``min_occurrences`` dates, sorted by weekday."""
+        recurring = []
+        for (series, weekday), slot_index in self.occurrences.items():
+            for slot in slot_index.slots:
+                if len(slot) >= min_occurrences:
+                    # Use the average time in the earliest time's UTC offset
+                    hour, minute = slot.display_time()
                     logger.debug(
-                        "Date range: %s to %s",
-                        cutoff.date(),
-                        latest_date.date(),
+                        "Analyzing series '%s' on %s at %s "
+                        "(range: %s-%s) with %d occurrences",
+                        series,
+                        f"weekday {weekday}",
+                        format_time(hour, minute),
+                        format_seconds_of_day(slot.earliest + slot.earliest_offset),
+                        format_seconds_of_day(slot.latest + slot.latest_offset),
+                        len(slot),
                     )
-                elif date < cutoff:
-                    logger.debug("Reached cutoff date: %s", date.date())
-                    break
-                logger.debug("Found schedule file: %s", day_file)
-                files.append(day_file)
-    return files
+                    dates = {
+                        datetime.fromordinal(date_ordinal).date()
+                        for date_ordinal in slot.date_ordinals()
+                    }
+                    recurring.append((weekday, hour, minute, series, dates))
 
+        # Sort by weekday and time, and slots at the same time by their dates
+        recurring.sort(key=lambda slot: (*slot[:4], sorted(slot[4])))
+        return recurring
 
-def load_schedule(file_path: Path) -> dict:
-    """Load and parse a schedule YAML file."""
-    yaml = YAML(typ="safe")
-    with file_path.open() as f:
-        return yaml.load(f)
+    def stability(
+        self,
+        dates: Iterable[datetime.date],
+        window_weeks: int = 13,
+        min_share: float = 0.75,
+    ) -> list[tuple[datetime.date, datetime.date, list[tuple[int, int, int, str]]]]:
+        """Return the slots which were stable in consecutive windows of weeks.
 
+        The windows are ``window_weeks`` weeks long and start on the Monday of the
+        earliest of the analyzed ``dates``. A slot is stable in a window if it aired
+        on at least ``min_share`` of the analyzed dates on its weekday in that
+        window. All windows are computed in a single pass over the slots by
+        shifting and masking their week bitsets.
 
-def normalize_program_name(name: str) -> str:
-    """Normalize program names with custom rules."""
-    name = name.strip()
-    if name == "Yle Uutiset ja sää":
-        return "Yle Uutiset"
-    return name
+        Returns:
+            The first and last day of each window, and the weekday, hour, minute
+            and series of the stable slots in it, sorted by weekday and time
 
+        """
+        date_ordinals = sorted({date.toordinal() for date in dates})
+        if not date_ordinals:
+            return []
+        first_week = (date_ordinals[0] - 1) // 7  # weeks since Monday 0001-01-01
+        window_count = ((date_ordinals[-1] - 1) // 7 - first_week) // window_weeks + 1
+        # Analyzed weeks of each weekday as bitsets aligned to the first week
+        analyzed = [0] * 7
+        for date_ordinal in date_ordinals:
+            week = (date_ordinal - 1) // 7 - first_week
+            analyzed[(date_ordinal - 1) % 7] |= 1 << week
+        mask = (1 << window_weeks) - 1
+        windows: list[list[tuple[int, int, int, str]]] = [
+            [] for _ in range(window_count)
+        ]
+        for (series, weekday), slot_index in self.occurrences.items():
+            for slot in slot_index.slots:
+                shift = (slot.first_date - 1) // 7 - first_week
+                weeks = slot.weeks << shift if shift >= 0 else slot.weeks >> -shift
+                for window, stable in enumerate(windows):
+                    offset = window * window_weeks
+                    possible = (analyzed[weekday] >> offset & mask).bit_count()
+                    aired = (weeks >> offset & mask).bit_count()
+                    if possible and aired >= min_share * possible:
+                        stable.append((weekday, *slot.display_time(), series))
+        first_monday = first_week * 7 + 1
+        return [
+            (
+                datetime.fromordinal(first_monday + 7 * window_weeks * window).date(),
+                datetime.fromordinal(
+                    first_monday + 7 * window_weeks * (window + 1) - 1,
+                ).date(),
+                sorted(stable),
+            )
+            for window, stable in enumerate(windows)
+        ]
 
-def extract_programs(schedule: dict) -> list[tuple[str, datetime]]:
-    """Extract program entries from schedule data."""
-    programs = []
-    content = next(iter(schedule.get("data", {}).values()))
-    for prog in content.get("programmes", []):
-        start_time = datetime.fromisoformat(prog["start_time"])
-        series = normalize_program_name(prog.get("series", prog.get("title", "")))
-        programs.append((series, start_time))
-    return programs
+    def to_json(self) -> dict:
+        """Return the analysis state as a JSON-serializable dictionary."""
+        return {
+            "version": STATE_VERSION,
+            "series_rules": self.normalizer.fingerprint,
+            "files": self.files,
+            "file_dates": self.file_dates,
+            "start_times": [
+                {
+                    "series": series,
+                    "weekday": weekday,
+                    "start": start_time.earliest,
+                    "utc_offset": start_time.earliest_offset,
+                    "first_date": start_time.first_date,
+                    "weeks": start_time.weeks,
+                }
+                for (series, weekday), slot_index in self.occurrences.items()
+                for start_time in slot_index.start_times.values()
+            ],
+        }
+
+    @classmethod
+    def from_json(
+        cls,
+        state: dict,
+        normalizer: SeriesNormalizer | None = None,
+    ) -> RecurringAnalysis:
+        """Create an analysis from a dictionary returned by `to_json`.
+
+        The state must have been saved with the same series normalization rules.
+        """
+        if state.get("version") != STATE_VERSION:
+            msg = f"Unsupported analysis state version {state.get('version')!r}"
+            raise ValueError(msg)
+        analysis = cls(normalizer)
+        if state.get("series_rules") != analysis.normalizer.fingerprint:
+            msg = "Analysis state was saved with other series normalization rules"
+            raise ValueError(msg)
+        analysis.files = state["files"]
+        analysis.file_dates = state["file_dates"]
+        for item in state["start_times"]:
+            key = (item["series"], item["weekday"])
+            slot_index = analysis.occurrences.get(key)
+            if slot_index is None:
+                slot_index = analysis.occurrences[key] = SlotIndex(SLOT_TOLERANCE)
+            slot_index.add(
+                item["start"],
+                item["utc_offset"],
+                item["first_date"],
+                item["weeks"],
+            )
+        return analysis
+
+    @classmethod
+    def load(
+        cls,
+        state_path: Path,
+        normalizer: SeriesNormalizer | None = None,
+    ) -> RecurringAnalysis:
+        """Load a saved analysis state from a JSON file."""
+        with state_path.open(encoding="utf-8") as f:
+            return cls.from_json(json.load(f), normalizer)
+
+    def save(self, state_path: Path) -> None:
+        """Save the analysis state to a JSON file."""
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = state_path.with_suffix(".tmp")
+        with temporary_path.open("w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(",", ":"))
+        temporary_path.replace(state_path)
+
+
+def fold_days(
+    days: Iterator[tuple[Path, ProgramTable]],
+    analysis_for: Callable[[Path], RecurringAnalysis],
+) -> None:
+    """Add the programs of each loaded day to the analysis of its file."""
+    while True:
+        with profiler.stage("loading"):
+            day = next(days, None)
+        if day is None:
+            break
+        file_path, programs = day
+        logger.debug("Processing file: %s", file_path)
+        profiler.count("files_loaded")
+        profiler.count("programs", len(programs))
+        with profiler.stage("matching"):
+            analysis_for(file_path).add_programs(programs)
+
+
+def analyze_channels(
+    channel_files: dict[str, list[Path]],
+    *,
+    cache: ScheduleCache | None = None,
+    jobs: int = 1,
+    normalizers: dict[str, SeriesNormalizer] | None = None,
+) -> dict[str, RecurringAnalysis]:
+    """Analyze the schedule files of several channels.
+
+    The files of all channels are loaded in one pass, so with ``jobs`` greater
+    than one a single process pool parses files of all channels concurrently.
+    Series titles of each channel are normalized with its normalizer in
+    ``normalizers``, or with the default rules.
+    """
+    normalizers = normalizers or {}
+    analyses = {
+        name: RecurringAnalysis(normalizers.get(name)) for name in channel_files
+    }
+    owners = {
+        file_path: analyses[name]
+        for name, files in channel_files.items()
+        for file_path in files
+    }
+    all_files = [file_path for files in channel_files.values() for file_path in files]
+    fold_days(load_days(all_files, cache, jobs), owners.__getitem__)
+    return analyses
 
 
 def analyze_recurring_programs(
     files: list[Path],
     min_occurrences: int = 2,
+    *,
+    cache: ScheduleCache | None = None,
+    jobs: int = 1,
+    normalizer: SeriesNormalizer | None = None,
 ) -> list[tuple[int, int, int, str, set[datetime.date]]]:
     """Analyze programs to find recurring patterns.
 
@@ -152,72 +2573,90 @@ def analyze_recurring_programs(
     ranges
     in a dictionary where:
     - Keys are (series, weekday) tuples
-    - Values are lists of ((earliest_time, latest_time), set(dates)) tuples
+    - Values are `SlotIndex` objects holding the `TimeSlot` ranges and their dates
 
     """
-    occurrences = defaultdict(list)
-    tolerance = timedelta(minutes=13)
+    analysis = RecurringAnalysis(normalizer)
+    analysis.add_files(files, cache, jobs)
+    return analysis.recurring(min_occurrences)
 
-    for file_path in files:
-        schedule = load_schedule(file_path)
-        programs = extract_programs(schedule)
 
-        logger.debug("Processing file: %s", file_path)
-        for series, start_time in programs:
-            logger.debug("  Found program: %s at %s", series, start_time)
-            weekday = start_time.weekday()
-
-            # Create a datetime with just time components for comparison
-            time_only = start_time.replace(year=2000, month=1, day=1)
-            key = (series, weekday)
-
-            # Try to find matching time slot
-            matched = False
-            for (earliest, latest), dates in occurrences[key]:
-                if earliest - tolerance <= time_only <= latest + tolerance:
-                    # Update time range if needed
-                    new_earliest = min(earliest, time_only)
-                    new_latest = max(latest, time_only)
-                    # Replace tuple with updated range
-                    idx = occurrences[key].index(((earliest, latest), dates))
-                    dates.add(start_time.date())
-                    occurrences[key][idx] = ((new_earliest, new_latest), dates)
-                    dates.add(start_time.date())
-                    matched = True
-                    break
+def update_analysis(
+    files: list[Path],
+    state_path: Path,
+    *,
+    cache: ScheduleCache | None = None,
+    jobs: int = 1,
+    normalizer: SeriesNormalizer | None = None,
+) -> RecurringAnalysis:
+    """Update a saved analysis with new schedule files and save it again.
+
+    Only files not in the saved state or changed since, and the unchanged files
+    sharing dates with them, are loaded, and the result is identical to a new
+    analysis of ``files``. If the series normalization rules have changed, all
+    files are loaded again.
+    """
+    analysis = None
+    if state_path.exists():
+        try:
+            analysis = RecurringAnalysis.load(state_path, normalizer)
+        except (ValueError, KeyError) as exc:
+            logger.warning("Ignoring unusable analysis state %s: %s", state_path, exc)
+    analysis = refresh_analysis(
+        analysis,
+        files,
+        cache=cache,
+        jobs=jobs,
+        normalizer=normalizer,
+    )
+    analysis.save(state_path)
+    return analysis
+
+
+def refresh_analysis(
+    analysis: RecurringAnalysis | None,
+    files: list[Path],
+    *,
+    cache: ScheduleCache | None = None,
+    jobs: int = 1,
+    normalizer: SeriesNormalizer | None = None,
+) -> RecurringAnalysis:
+    """Update an analysis for ``files``, or analyze ``files`` from scratch.
+
+    Only new and changed files, and the unchanged files sharing dates with them
+    or with files no longer in ``files``, are loaded, see
+    `RecurringAnalysis.update_files`.
+    """
+    if analysis is None:
+        analysis = RecurringAnalysis(normalizer)
+    analysis.update_files(files, cache, jobs)
+    return analysis
 
-            if not matched:
-                # Create new time slot
-                occurrences[key].append(((time_only, time_only), {start_time.date()}))
-
-    # Filter for programs occurring multiple times
-    recurring = []
-    for (series, weekday), time_slots in occurrences.items():
-        for (earliest, latest), dates in time_slots:
-            if len(dates) >= min_occurrences:
-                # Use the average time for display
-                avg_time = earliest + (latest - earliest) / 2
-                logger.debug(
-                    "Analyzing series '%s' on %s at %s "
-                    "(range: %s-%s) with %d occurrences",
-                    series,
-                    f"weekday {weekday}",
-                    avg_time.strftime("%H:%M"),
-                    earliest.strftime("%H:%M"),
-                    latest.strftime("%H:%M"),
-                    len(dates),
-                )
-                recurring.append(
-                    (weekday, avg_time.hour, avg_time.minute, series, dates),
-                )
 
-    # Sort by time then weekday
-    recurring.sort()
-    return recurring
+def default_state_path(cache_dir: str | Path, root_dir: str) -> Path:
+    """Return the analysis state file path for a schedule root directory."""
+    import hashlib  # noqa: PLC0415
+
+    root_hash = hashlib.sha256(str(Path(root_dir).resolve()).encode()).hexdigest()
+    return Path(cache_dir) / f"state-{root_hash[:16]}.json"
+
+
+def schedule_file_date(file_path: Path) -> datetime.date:
+    """Return the date of a ``YYYY/MM/DD.yaml`` schedule file from its path."""
+    return (
+        datetime.strptime(
+            file_path.parent.parent.name + file_path.parent.name + file_path.stem,
+            "%Y%m%d",
+        )
+        .replace(tzinfo=timezone.utc)
+        .date()
+    )
 
 
 def log_directory_contents(directory: Path, prefix: str = "") -> None:
     """Log the contents of a directory with optional prefix for context."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     logger.debug("%sDirectory contents:", prefix)
     for item in directory.iterdir():
         logger.debug(
@@ -233,6 +2672,12 @@ def format_time(hour: int, minute: int) -> str:
     return f"{hour:02d}:{minute:02d}"
 
 
+def format_seconds_of_day(seconds: int) -> str:
+    """Format seconds since midnight, wrapping around at 24 hours, as HH:MM."""
+    seconds %= SECONDS_PER_DAY
+    return format_time(seconds // 3600, seconds // 60 % 60)
+
+
 def format_dates(dates: set[datetime.date]) -> str:
     """Format a set of dates intelligently as ranges or lists."""
     sorted_dates = sorted(dates)
@@ -268,66 +2713,485 @@ def format_dates(dates: set[datetime.date]) -> str:
     return ", ".join(formatted_parts)
 
 
-def count_weekday_occurrences(files: list[Path], weekday: int) -> int:
+class FileDateIndex:
+    """Dates of schedule files parsed once from their ``YYYY/MM/DD.yaml`` paths."""
+
+    def __init__(self, files: list[Path]) -> None:
+        """Index ``files`` by date and count the dates on each weekday."""
+        self.paths: dict[datetime.date, Path] = {}
+        for file_path in files:
+            self.paths.setdefault(schedule_file_date(file_path), file_path)
+        self.weekday_counts = [0] * 7
+        for date in self.paths:
+            self.weekday_counts[date.weekday()] += 1
+
+    @property
+    def dates(self) -> KeysView[datetime.date]:
+        """Return the dates of the indexed files."""
+        return self.paths.keys()
+
+
+def count_weekday_occurrences(files: list[Path] | FileDateIndex, weekday: int) -> int:
     """Count how many times a weekday occurs in the analyzed files."""
-    dates = {
-        datetime.strptime(
-            f.parent.parent.name + f.parent.name + f.stem,
-            "%Y%m%d",
-        )
-        .replace(tzinfo=timezone.utc)
-        .date()
-        for f in files
-    }
-    return sum(1 for date in dates if date.weekday() == weekday)
+    if not isinstance(files, FileDateIndex):
+        files = FileDateIndex(files)
+    return files.weekday_counts[weekday]
 
 
-def main() -> None:
-    """Analyze schedule files and report recurring programs."""
-    args = parse_args()
-    setup_logging(debug=args.debug)
+def open_cache(
+    args: argparse.Namespace,
+) -> AbstractContextManager[ScheduleCache | None]:
+    """Open the schedule cache requested on the command line, if any."""
+    if args.no_cache:
+        return nullcontext()
+    return ScheduleCache(
+        args.cache_dir,
+        verify_hash=args.cache_verify_hash,
+        rebuild=args.rebuild_cache,
+    )
 
-    files = find_schedule_files(args.directory)
-    if not files:
-        logger.warning("No schedule files found in the specified time window")
-        return
 
-    # Get timezone from first file's metadata
-    tz_name = None
-    if files:
-        schedule = load_schedule(files[0])
-        tz_name = schedule.get("metadata", {}).get("timezone", "Europe/Helsinki")
+def run_analysis(
+    args: argparse.Namespace,
+    channel_files: dict[str, list[Path]],
+) -> dict[str, tuple[str, list, list | None]]:
+    """Find recurring programs of each channel as requested on the command line.
 
-    recurring = analyze_recurring_programs(files)
+    Returns:
+        The timezone, the recurring programs and, with ``--stability``, the stable
+        slots of each period for each channel directory
 
-    if args.format == "html":
-        from templates.html_generator import generate_html_table
-
-        by_weekday = defaultdict(list)
-        for weekday, hour, minute, series, dates in recurring:
-            time_str = format_time(hour, minute)
-            by_weekday[weekday].append((time_str, series, dates))
-        html_output = generate_html_table(by_weekday, files, tz_name=tz_name)
-        sys.stdout.write(html_output + "\n")
-        return
+    """
+    results = {}
+    normalizers = {
+        directory: SeriesNormalizer.from_rules(args.series_rules, Path(directory).name)
+        for directory in channel_files
+    }
+    with open_cache(args) as cache:
+        jobs = args.jobs or os.cpu_count() or 1
+        if args.incremental:
+            analyses = {
+                directory: update_analysis(
+                    files,
+                    args.state_file or default_state_path(args.cache_dir, directory),
+                    cache=cache,
+                    jobs=jobs,
+                    normalizer=normalizers[directory],
+                )
+                for directory, files in channel_files.items()
+            }
+        else:
+            analyses = analyze_channels(
+                channel_files,
+                cache=cache,
+                jobs=jobs,
+                normalizers=normalizers,
+            )
+        for directory, analysis in analyses.items():
+            # Get timezone from first file's metadata
+            tz_name, _ = load_day(channel_files[directory][0], cache)
+            with profiler.stage("recurring"):
+                stability = None
+                if args.stability is not None:
+                    stability = analysis.stability(
+                        FileDateIndex(channel_files[directory]).dates,
+                        args.stability,
+                    )
+                results[directory] = tz_name, analysis.recurring(), stability
+            for name, amount in analysis.stats().items():
+                profiler.count(name, amount)
+        if cache is not None:
+            cache.evict(
+                (file_path for files in channel_files.values() for file_path in files),
+                channel_files,
+            )
+            logger.debug(
+                "Schedule cache: %d hits, %d misses",
+                cache.hits,
+                cache.misses,
+            )
+            profiler.count("cache_hits", cache.hits)
+            profiler.count("cache_misses", cache.misses)
+    return results
 
-    # Text output
+
+def format_text_report(
+    recurring: list[tuple[int, int, int, str, set[datetime.date]]],
+    file_index: FileDateIndex,
+) -> list[str]:
+    """Format recurring programs as lines of text grouped by weekday and time."""
     by_weekday_time = defaultdict(lambda: defaultdict(list))
     for weekday, hour, minute, series, dates in recurring:
         time_str = format_time(hour, minute)
-        expected_occurrences = count_weekday_occurrences(files, weekday)
+        expected_occurrences = count_weekday_occurrences(file_index, weekday)
         if len(dates) < expected_occurrences:
             series_with_dates = f"{series} ({format_dates(dates)})"
             by_weekday_time[weekday][time_str].append(series_with_dates)
         else:
             by_weekday_time[weekday][time_str].append(series)
 
-
+    lines = []
     for weekday in range(7):
         if weekday in by_weekday_time:
-            logger.info("Weekday %d:", weekday)
+            lines.append(f"Weekday {weekday}:")
             for time_str, series_list in sorted(by_weekday_time[weekday].items()):
-                logger.info("  %s: %s", time_str, " / ".join(sorted(series_list)))
+                lines.append(f"  {time_str}: {' / '.join(sorted(series_list))}")
+    return lines
+
+
+def format_stability_report(
+    stability: list[tuple[datetime.date, datetime.date, list]],
+) -> list[str]:
+    """Format the stable slots of each period as lines of text."""
+    lines = []
+    for first_day, last_day, stable in stability:
+        lines.append(f"Stable {first_day.isoformat()} - {last_day.isoformat()}:")
+        lines.extend(
+            f"  Weekday {weekday} {format_time(hour, minute)}: {series}"
+            for weekday, hour, minute, series in stable
+        )
+    return lines
+
+
+@cache
+def json_encoder() -> Callable[[object], str]:
+    """Return a function serializing JSON compactly, using orjson if installed."""
+    try:
+        import orjson  # noqa: PLC0415
+    except ImportError:
+        return json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    return lambda value: orjson.dumps(value).decode()
+
+
+def recurring_records(
+    recurring: list[tuple[int, int, int, str, set[datetime.date]]],
+) -> Iterator[dict]:
+    """Yield recurring programs as JSON-serializable records with ISO dates."""
+    for weekday, hour, minute, series, dates in recurring:
+        yield {
+            "weekday": weekday,
+            "hour": hour,
+            "minute": minute,
+            "series": series,
+            "dates": sorted(date.isoformat() for date in dates),
+        }
+
+
+def stream_json_report(
+    recurring: list[tuple[int, int, int, str, set[datetime.date]]],
+    *,
+    ndjson: bool = False,
+) -> Iterator[str]:
+    """Serialize recurring programs as a JSON array, or as one record per line.
+
+    Each record has the ``weekday``, ``hour``, ``minute``, ``series`` and ``dates``
+    of a recurring program. Weekdays are numbered from 0 for Monday, and dates are
+    sorted ISO 8601 dates.
+    """
+    encode = json_encoder()
+    if ndjson:
+        for record in recurring_records(recurring):
+            yield f"{encode(record)}\n"
+    else:
+        yield f"{encode(list(recurring_records(recurring)))}\n"
+
+
+def stream_html_report(
+    recurring: list[tuple[int, int, int, str, set[datetime.date]]],
+    file_index: FileDateIndex,
+    tz_name: str,
+    *,
+    static_dir: Path | None = None,
+) -> Iterator[str]:
+    """Render recurring programs as an HTML page in chunks.
+
+    The JavaScript and CSS assets are written into ``static_dir`` if given.
+    """
+    from templates.html_generator import stream_html_table, write_assets  # noqa: PLC0415
+
+    by_weekday = defaultdict(list)
+    for weekday, hour, minute, series, dates in recurring:
+        time_str = format_time(hour, minute)
+        by_weekday[weekday].append((time_str, series, dates))
+    if static_dir is not None:
+        write_assets(static_dir)
+    return stream_html_table(
+        by_weekday,
+        list(file_index.paths.values()),
+        tz_name=tz_name,
+        file_dates=file_index.dates,
+    )
+
+
+def write_channel_reports(
+    args: argparse.Namespace,
+    channel_files: dict[str, list[Path]],
+    results: dict[str, tuple[str, list, list | None]],
+) -> None:
+    """Write one report per channel and an HTML index page into the output dir."""
+    from templates.html_generator import generate_index_html, write_assets  # noqa: PLC0415
+
+    output_dir: Path = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index = []
+    for directory, (tz_name, recurring, stability) in results.items():
+        name = Path(directory).name
+        file_index = FileDateIndex(channel_files[directory])
+        if args.format == "html":
+            filename = f"{name}.html"
+            stage = "rendering"
+            chunks = stream_html_report(recurring, file_index, tz_name)
+        elif args.format in ("json", "ndjson"):
+            filename = f"{name}.{args.format}"
+            stage = "formatting"
+            chunks = stream_json_report(recurring, ndjson=args.format == "ndjson")
+        else:
+            filename = f"{name}.txt"
+            stage = "formatting"
+            lines = format_text_report(recurring, file_index)
+            if stability is not None:
+                lines += format_stability_report(stability)
+            chunks = (f"{line}\n" for line in lines)
+        with (
+            profiler.stage(stage),
+            (output_dir / filename).open(
+                "w",
+                encoding="utf-8",
+                buffering=OUTPUT_BUFFER_SIZE,
+            ) as f,
+        ):
+            f.writelines(chunks)
+            if args.format == "html":
+                f.write("\n")
+        index.append((name, filename, len(recurring)))
+        logger.info("Wrote %s", output_dir / filename)
+
+    if args.format == "html":
+        write_assets(output_dir)
+        (output_dir / "index.html").write_text(
+            generate_index_html(index) + "\n",
+            encoding="utf-8",
+        )
+
+
+def report_recurring_programs(args: argparse.Namespace) -> None:
+    """Analyze schedule files and write the report in the requested format."""
+    channel_files = {}
+    with profiler.stage("discovery"):
+        for directory in args.directories:
+            files = find_schedule_files(
+                directory,
+                args.weeks,
+                since=args.since,
+                until=args.until,
+            )
+            profiler.count("files_found", len(files))
+            if files:
+                channel_files[directory] = files
+            else:
+                logger.warning(
+                    "No schedule files found in the specified time window in %s",
+                    directory,
+                )
+    if not channel_files:
+        return
+
+    results = run_analysis(args, channel_files)
+    if args.output_dir is not None:
+        write_channel_reports(args, channel_files, results)
+        return
+
+    [(directory, (tz_name, recurring, stability))] = results.items()
+    file_index = FileDateIndex(channel_files[directory])
+    if args.format == "html":
+        with profiler.stage("rendering"):
+            sys.stdout.writelines(
+                stream_html_report(recurring, file_index, tz_name, static_dir=Path()),
+            )
+            sys.stdout.write("\n")
+        return
+    if args.format in ("json", "ndjson"):
+        with profiler.stage("formatting"):
+            sys.stdout.writelines(
+                stream_json_report(recurring, ndjson=args.format == "ndjson"),
+            )
+        return
+
+    # Text output
+    with profiler.stage("formatting"):
+        lines = format_text_report(recurring, file_index)
+        if stability is not None:
+            lines += format_stability_report(stability)
+    for line in lines:
+        logger.info("%s", line)
+
+
+def convert_schedule_files(
+    root_dir: str | Path,
+    sidecar_format: str,
+    *,
+    force: bool = False,
+) -> tuple[int, int]:
+    """Write sidecar files for the schedule files under a directory.
+
+    Files with an up-to-date sidecar file are skipped unless ``force`` is set.
+
+    Returns:
+        The numbers of converted files and of files which couldn't be converted
+
+    """
+    converted = failed = 0
+    for file_path in iter_schedule_files(root_dir):
+        if not force and load_sidecar(file_path, sidecar_format) is not None:
+            continue
+        schedule = schedule_loader.load_yaml(file_path)
+        if write_sidecar(file_path, sidecar_format, schedule):
+            converted += 1
+        else:
+            logger.warning("Can't convert %s to %s exactly", file_path, sidecar_format)
+            failed += 1
+    return converted, failed
+
+
+def parse_pack_args(argv: list[str]) -> argparse.Namespace:
+    """Parse the command line arguments of the ``pack`` subcommand.
+
+    Returns:
+        Parsed command line arguments
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="schedule-analyzer pack",
+        description="Append new and changed schedule files of channel directories "
+        f"to a {ARCHIVE_FILENAME} archive in each directory",
+    )
+    parser.add_argument(
+        "directories",
+        nargs="+",
+        metavar="DIRECTORY",
+        help="Root directory containing YYYY/MM/DD.yaml schedule files",
+    )
+    parser.add_argument(
+        "--loader",
+        choices=[name for name in LOADERS if name not in SIDECAR_SUFFIXES],
+        default="auto",
+        help="Schedule file parser backend (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug logging",
+    )
+    args = parser.parse_args(argv)
+    if not loader_available(args.loader):
+        parser.error(f"--loader {args.loader} requires the fast extra to be installed")
+    return args
+
+
+def pack_main(argv: list[str]) -> None:
+    """Pack schedule files into archives."""
+    args = parse_pack_args(argv)
+    setup_logging(debug=args.debug)
+    select_loader(args.loader)
+    for directory in args.directories:
+        packed, unchanged = pack_schedule_files(directory)
+        logger.info(
+            "%s: packed %d files, %d already up to date",
+            directory,
+            packed,
+            unchanged,
+        )
+
+
+def convert_main(argv: list[str]) -> None:
+    """Convert schedule YAML files to sidecar files."""
+    args = parse_convert_args(argv)
+    setup_logging(debug=args.debug)
+    select_loader(args.loader)
+    for directory in args.directories:
+        converted, failed = convert_schedule_files(directory, args.to, force=args.force)
+        logger.info(
+            "%s: converted %d files to %s, %d failed",
+            directory,
+            converted,
+            args.to,
+            failed,
+        )
+
+
+def serve_main(argv: list[str]) -> None:
+    """Serve the page of a channel, refreshing it as schedule files change."""
+    from schedule_server import ScheduleModel, ScheduleServer  # noqa: PLC0415
+
+    args = parse_serve_args(argv)
+    setup_logging(debug=args.debug)
+    select_loader(args.loader)
+    select_read_ahead(args.read_ahead, args.read_ahead_memory)
+    with open_cache(args) as cache:
+        model = ScheduleModel(
+            args.directory,
+            weeks=args.weeks,
+            cache=cache,
+            jobs=args.jobs or os.cpu_count() or 1,
+            normalizer=SeriesNormalizer.from_rules(
+                args.series_rules,
+                Path(args.directory).name,
+            ),
+        )
+        model.refresh()
+        server = ScheduleServer((args.host, args.port), model)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        logger.info("Serving %s at http://%s:%d/", args.directory, host, port)
+        try:
+            while True:
+                time.sleep(args.interval)
+                try:
+                    model.refresh()
+                except Exception:  # keep serving the previous page
+                    logger.exception("Failed to refresh the analysis")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+COMMANDS: dict[str, Callable[[list[str]], None]] = {
+    "convert": convert_main,
+    "pack": pack_main,
+    "serve": serve_main,
+}
+
+
+def main() -> None:
+    """Analyze schedule files and report recurring programs."""
+    command = COMMANDS.get(sys.argv[1]) if len(sys.argv) > 1 else None
+    if command is not None:
+        command(sys.argv[2:])
+        return
+    args = parse_args()
+    setup_logging(debug=args.debug)
+    select_loader(args.loader)
+    select_read_ahead(args.read_ahead, args.read_ahead_memory)
+
+    if args.profile is not None:
+        profiler.enable(memory=args.profile_memory)
+    cprofile = None
+    if args.cprofile:
+        import cProfile  # noqa: PLC0415
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    try:
+        report_recurring_programs(args)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(args.cprofile)
+        if args.profile is not None:
+            profiler.disable()
+            profiler.write_report(args.profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+"""HTTP server keeping the page of one channel up to date in memory."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import time
+from datetime import date, datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from schedule_analyzer import (
+    FileDateIndex,
+    file_stamp,
+    find_schedule_files,
+    load_day,
+    refresh_analysis,
+    stream_html_report,
+)
+
+if TYPE_CHECKING:
+    from schedule_analyzer import RecurringAnalysis, ScheduleCache, SeriesNormalizer
+
+logger = logging.getLogger(__name__)
+
+STATIC_CONTENT_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class Resource:
+    """An HTTP response body with its gzip-compressed variant and validators."""
+
+    __slots__ = (
+        "body",
+        "cache_control",
+        "content_type",
+        "etag",
+        "gzipped",
+        "modified",
+    )
+
+    def __init__(
+        self,
+        body: bytes,
+        content_type: str,
+        modified: float,
+        *,
+        cache_control: str = "no-cache",
+    ) -> None:
+        """Compress ``body`` and compute its entity tag.
+
+        ``modified`` is the time of the last change as seconds since the epoch.
+        Clients must revalidate the resource before reusing it unless another
+        ``cache_control`` is given.
+        """
+        self.body = body
+        self.cache_control = cache_control
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.content_type = content_type
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.modified = int(modified)
+
+    def entity_tag(self, *, gzipped: bool) -> str:
+        """Return the quoted entity tag of the plain or gzip-compressed body."""
+        return f'"{self.etag}-gzip"' if gzipped else f'"{self.etag}"'
+
+    def is_fresh(
+        self,
+        if_none_match: str | None,
+        if_modified_since: str | None,
+    ) -> bool:
+        """Return whether a client's cached copy is still valid.
+
+        ``If-None-Match`` takes precedence over ``If-Modified-Since``, and either
+        variant of the entity tag matches. HTTP dates are in GMT, so a date
+        without a zone (such as one with ``-0000``) is taken to be in UTC.
+        """
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or any(
+                self.entity_tag(gzipped=gzipped) in tags for gzipped in (False, True)
+            )
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.modified <= since.timestamp()
+        return False
+
+
+class ScheduleModel:
+    """The analysis of one channel kept up to date in memory, with its page.
+
+    `refresh` folds new and changed schedule files into the analysis and renders
+    the page again. If neither the files nor the current date have changed, it
+    only checks the modification times and sizes of the files.
+    The page is replaced as a whole, so request handlers in other threads always
+    see either the old or the new page.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        weeks: int = 4,
+        cache: ScheduleCache | None = None,
+        jobs: int = 1,
+        normalizer: SeriesNormalizer | None = None,
+    ) -> None:
+        """Create a model of the schedule files in ``directory``."""
+        self.directory = directory
+        self.weeks = weeks
+        self.cache = cache
+        self.jobs = jobs
+        self.normalizer = normalizer
+        self.analysis: RecurringAnalysis | None = None
+        self.page: Resource | None = None
+        self._tz_name: str | None = None
+        self._today: date | None = None
+
+    def refresh(self) -> bool:
+        """Update the analysis and the page from the schedule files.
+
+        Returns:
+            Whether the page was rendered again
+
+        """
+        from zoneinfo import ZoneInfo  # noqa: PLC0415
+
+        files = find_schedule_files(self.directory, self.weeks)
+        if not files:
+            logger.warning("No schedule files found in %s", self.directory)
+            return False
+        stamps = {
+            str(file_path.resolve()): file_stamp(file_path) for file_path in files
+        }
+        if (
+            self.analysis is not None
+            and stamps == self.analysis.files
+            and datetime.now(ZoneInfo(self._tz_name)).date() == self._today
+        ):
+            return False
+        self.analysis = refresh_analysis(
+            self.analysis,
+            files,
+            cache=self.cache,
+            jobs=self.jobs,
+            normalizer=self.normalizer,
+        )
+        self._tz_name, _ = load_day(files[0], self.cache)
+        self._today = datetime.now(ZoneInfo(self._tz_name)).date()
+        file_index = FileDateIndex(files)
+        html = "".join(
+            stream_html_report(self.analysis.recurring(), file_index, self._tz_name),
+        )
+        self.page = Resource(
+            f"{html}\n".encode(),
+            "text/html; charset=utf-8",
+            time.time(),
+        )
+        logger.info("Rendered the page from %d schedule files", len(files))
+        return True
+
+
+class ScheduleServer(ThreadingHTTPServer):
+    """Serves the page of a `ScheduleModel` and the JavaScript and CSS assets.
+
+    The assets have content-hashed names, so browsers may cache them for good.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], model: ScheduleModel) -> None:
+        """Build the assets and start listening on ``address``."""
+        from templates.html_generator import build_assets  # noqa: PLC0415
+
+        super().__init__(address, ScheduleRequestHandler)
+        self.model = model
+        self.static = {}
+        started = time.time()
+        for name, body in build_assets().values():
+            self.static[f"/{name}"] = Resource(
+                body,
+                STATIC_CONTENT_TYPES[Path(name).suffix],
+                started,
+                cache_control=IMMUTABLE_CACHE_CONTROL,
+            )
+
+    def resource(self, path: str) -> Resource | None:
+        """Return the resource for a request path, if any."""
+        if path in ("/", "/index.html"):
+            return self.model.page
+        return self.static.get(path)
+
+
+class ScheduleRequestHandler(BaseHTTPRequestHandler):
+    """Answers requests from the precompressed resources of a `ScheduleServer`."""
+
+    server: ScheduleServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        """Send a resource."""
+        self.send_resource(head=False)
+
+    def do_HEAD(self) -> None:
+        """Send the headers of a resource."""
+        self.send_resource(head=True)
+
+    def send_resource(self, *, head: bool) -> None:
+        """Send a resource, compressed if accepted, or 304 if the client has it."""
+        resource = self.server.resource(urlsplit(self.path).path)
+        if resource is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        gzipped = accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        fresh = resource.is_fresh(
+            self.headers.get("If-None-Match"),
+            self.headers.get("If-Modified-Since"),
+        )
+        self.send_response(HTTPStatus.NOT_MODIFIED if fresh else HTTPStatus.OK)
+        self.send_header("ETag", resource.entity_tag(gzipped=gzipped))
+        self.send_header("Last-Modified", formatdate(resource.modified, usegmt=True))
+        self.send_header("Cache-Control", resource.cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        if fresh:
+            self.end_headers()
+            return
+        body = resource.gzipped if gzipped else resource.body
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        """Log requests with the module logger instead of printing them."""
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Return whether an ``Accept-Encoding`` header allows gzip compression."""
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        if coding.strip().lower() not in ("gzip", "x-gzip", "*"):
+            continue
+        quality = parameters.strip().removeprefix("q=") or "1"
+        try:
+            return float(quality) > 0
+        except ValueError:
+            return False
+    return False
@@ -2,28 +2,464 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import gzip
+import hashlib
+import re
+from datetime import date, datetime, timedelta
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import jinja2
 from zoneinfo import ZoneInfo
 
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterator
+
+TEMPLATE_DIR = Path(__file__).parent
+TEMPLATES = ["schedule.html", "index.html"]
+# Entry points of the assets referenced by the pages, bundled with their imports
+ASSET_SOURCES = ["schedule.js", "style.css"]
+ASSET_HASH_LENGTH = 12
+ASSET_FILENAME = re.compile(
+    rf"(?P<name>(?P<stem>[\w-]+)\.[0-9a-f]{{{ASSET_HASH_LENGTH}}}\.(?P<suffix>js|css))"
+    r"(?:\.gz|\.br)?",
+)
+JS_IMPORT = re.compile(
+    r"^import\s*\{(?P<names>[^}]*)\}\s*from\s*(?P<quote>['\"])\./"
+    r"(?P<module>[\w.-]+)(?P=quote)[ \t]*;?[ \t]*\n?",
+    re.MULTILINE,
+)
+JS_EXPORT = re.compile(
+    r"^export\s+(?=(?:async\s+)?function\s*\*?\s*([\w$]+)"
+    r"|(?:const|let|var|class)\s+([\w$]+))",
+    re.MULTILINE,
+)
+JS_MODULE_STATEMENT = re.compile(r"^(?:import|export)\b.*", re.MULTILINE)
+# Characters after which a slash starts a regular expression rather than a division
+JS_REGEX_PRECEDERS = frozenset("(,=:[!&|?{};+-*%<>~^")
+JS_REGEX_KEYWORD = re.compile(
+    r"(?<![\w$.])(?:await|case|delete|do|else|in|of|return|throw|typeof|void|yield)$",
+)
+CSS_SPACE = r"(?:\s|/\*.*?\*/)"
+CSS_TOKEN = re.compile(
+    r"""(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""
+    rf"|{CSS_SPACE}*(?P<semicolon>;){CSS_SPACE}*(?=}})"
+    rf"|{CSS_SPACE}*(?P<punctuation>[{{}};,>]){CSS_SPACE}*"
+    rf"|(?P<colon>:){CSS_SPACE}*"
+    rf"|{CSS_SPACE}+",
+    re.DOTALL,
+)
+
+
+@cache
+def get_environment() -> jinja2.Environment:
+    """Return the Jinja2 environment shared by all pages rendered in the process.
+
+    Compiled templates are kept in a bytecode cache in the system temporary
+    directory, so later processes skip compiling them. Templates are loaded once
+    and not checked for changes on disk.
+    """
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        auto_reload=False,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(),
+    )
+    # Keep the JSON index embedded in the page compact
+    env.policies["json.dumps_kwargs"] = {"sort_keys": True, "separators": (",", ":")}
+    for name in TEMPLATES:
+        env.get_template(name)
+    return env
+
+
+@cache
+def build_assets() -> dict[str, tuple[str, bytes]]:
+    """Bundle the JavaScript and trim the JavaScript and CSS files used by the pages.
+
+    Each asset is named after the hash of its content, so the files can be
+    cached by browsers for good.
+
+    Returns:
+        The file name and content of each asset by the name of its source file
+
+    """
+    assets = {}
+    for source in ASSET_SOURCES:
+        if source.endswith(".js"):
+            content = trim_javascript(bundle_javascript(source))
+        else:
+            content = trim_css((TEMPLATE_DIR / source).read_text(encoding="utf-8"))
+        body = content.encode()
+        digest = hashlib.sha256(body).hexdigest()[:ASSET_HASH_LENGTH]
+        stem, _, suffix = source.rpartition(".")
+        assets[source] = f"{stem}.{digest}.{suffix}", body
+    return assets
+
+
+def asset_names() -> dict[str, str]:
+    """Return the content-hashed file name of each asset by its source file name."""
+    return {source: name for source, (name, _) in build_assets().items()}
+
+
+def write_assets(output_dir: Path) -> list[Path]:
+    """Write the assets used by the pages into ``output_dir``.
+
+    Each asset gets precompressed ``.gz`` and, if the ``brotli`` package is
+    installed, ``.br`` siblings for web servers which serve those directly.
+    Assets already present are left untouched, since their names change with
+    their content, and earlier versions of the assets are removed.
+
+    Returns:
+        The paths of the files which were written
+
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        import brotli  # noqa: PLC0415
+    except ImportError:
+        brotli = None
+    written = []
+    for name, body in build_assets().values():
+        variants = {name: body, f"{name}.gz": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            variants[f"{name}.br"] = brotli.compress(body)
+        for filename, content in variants.items():
+            dest = output_dir / filename
+            if not dest.exists():
+                dest.write_bytes(content)
+                written.append(dest)
+    prune_assets(output_dir)
+    return written
+
+
+def prune_assets(output_dir: Path) -> list[Path]:
+    """Remove earlier versions of the assets and their siblings from ``output_dir``.
+
+    Returns:
+        The paths of the files which were removed
+
+    """
+    current = {name for name, _ in build_assets().values()}
+    removed = []
+    for path in output_dir.iterdir():
+        match = ASSET_FILENAME.fullmatch(path.name)
+        if (
+            match
+            and f"{match['stem']}.{match['suffix']}" in ASSET_SOURCES
+            and match["name"] not in current
+        ):
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def bundle_javascript(entry: str) -> str:
+    """Bundle a JavaScript module with the modules it imports into one module.
+
+    Each imported module is wrapped in a function returning its exports, and
+    ``import { a, b as c } from './module.js';`` statements are replaced by taking
+    the names from the result. Only named imports of sibling modules and exported
+    declarations are supported.
+
+    Raises:
+        ValueError: If a module has other kinds of import or export statements
+
+    """
+    dependencies: dict[str, str] = {}
+
+    def strip_module(name: str) -> tuple[str, list[str]]:
+        source = (TEMPLATE_DIR / name).read_text(encoding="utf-8")
+        for match in JS_IMPORT.finditer(source):
+            dependency = match["module"]
+            if dependency not in dependencies:
+                dependencies[dependency] = ""  # guard against import cycles
+                body, exports = strip_module(dependency)
+                dependencies[dependency] = (
+                    f"const {module_variable(dependency)} = (() => {{\n{body}"
+                    f"return {{ {', '.join(exports)} }};\n}})();\n"
+                )
+        exports = [
+            function or declaration
+            for function, declaration in JS_EXPORT.findall(source)
+        ]
+        body = JS_EXPORT.sub("", JS_IMPORT.sub(import_names, source))
+        if unsupported := JS_MODULE_STATEMENT.search(body):
+            msg = f"Unsupported statement in {name}: {unsupported[0]}"
+            raise ValueError(msg)
+        return body, exports
+
+    body, _ = strip_module(entry)
+    return "".join(dependencies.values()) + body
+
+
+def import_names(match: re.Match[str]) -> str:
+    """Return a declaration taking the names of an import from the bundled module."""
+    names = [
+        name.strip().replace(" as ", ": ")
+        for name in match["names"].split(",")
+        if name.strip()
+    ]
+    return f"const {{ {', '.join(names)} }} = {module_variable(match['module'])};\n"
+
+
+def module_variable(name: str) -> str:
+    """Return the variable holding the exports of a bundled module."""
+    return "__" + re.sub(r"\W", "_", name)
+
+
+def trim_javascript(source: str) -> str:
+    """Remove comments, indentation, trailing whitespace and blank lines from code.
+
+    Strings, template literals and regular expression literals are copied as they
+    are, and line breaks are kept so that automatic semicolon insertion works as
+    before. Names and other whitespace are not touched.
+    """
+    output: list[str] = []
+    # Open braces in each template literal substitution being scanned
+    substitutions: list[int] = []
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char == "\n":
+            end_line(output)
+            i += 1
+        elif char in " \t" and (not output or output[-1] == "\n"):
+            i += 1
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = len(source) if end < 0 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = len(source) if end < 0 else end + 2
+            if "\n" in source[i:end]:
+                end_line(output)
+            elif output and output[-1] not in {" ", "\t", "\n"}:
+                output.append(" ")
+            while end < len(source) and source[end] in " \t":
+                end += 1
+            i = end
+        elif char in "'\"":
+            i = copy_literal(source, i, output, char)
+        elif char == "`" or (char == "}" and substitutions[-1:] == [0]):
+            if char == "}":
+                substitutions.pop()
+            i = copy_literal(source, i, output, "`")
+            if output[-1].endswith("${"):
+                substitutions.append(0)
+        elif char == "/" and starts_regex("".join(output[-16:])):
+            i = copy_literal(source, i, output, "/")
+            while i < len(source) and source[i].isalpha():
+                output.append(source[i])
+                i += 1
+        else:
+            if substitutions and char in "{}":
+                substitutions[-1] += 1 if char == "{" else -1
+            output.append(char)
+            i += 1
+    end_line(output)
+    return "".join(output).rstrip()
+
+
+def end_line(output: list[str]) -> None:
+    """Drop trailing whitespace from the code and end its line unless it is blank."""
+    while output and output[-1] in {" ", "\t"}:
+        output.pop()
+    if output and output[-1] != "\n":
+        output.append("\n")
+
+
+def copy_literal(source: str, start: int, output: list[str], quote: str) -> int:
+    """Copy a string, template literal part or regular expression to ``output``.
+
+    Template literal parts end at a backtick or at the start of a substitution,
+    and regular expressions end at a slash outside a character class.
+
+    Returns:
+        The index following the copied literal
+
+    """
+    i = start + 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            i += 1
+        elif quote == "`" and source.startswith("${", i):
+            i += 1
+            break
+        elif quote == "/" and char in "[]":
+            in_class = char == "["
+        elif char == quote and not in_class:
+            break
+        elif char == "\n" and quote != "`":
+            i -= 1
+            break
+        i += 1
+    output.append(source[start : i + 1])
+    return i + 1
+
+
+def starts_regex(code: str) -> bool:
+    """Return whether a slash following ``code`` starts a regular expression."""
+    code = code.rstrip()
+    return (
+        not code
+        or code[-1] in JS_REGEX_PRECEDERS
+        or JS_REGEX_KEYWORD.search(code) is not None
+    )
+
+
+def trim_css(source: str) -> str:
+    """Remove comments and whitespace which has no effect from CSS.
+
+    Strings are copied as they are. Whitespace before a colon is kept, since it
+    separates a descendant selector from a pseudo-class.
+    """
+
+    def replace(match: re.Match[str]) -> str:
+        if match["string"] is not None:
+            return match["string"]
+        if match["punctuation"] is not None:
+            return match["punctuation"]
+        if match["semicolon"] is not None:
+            return ""
+        if match["colon"] is not None:
+            return ":"
+        return " "
+
+    return CSS_TOKEN.sub(replace, source).strip()
+
+
+def generate_index_html(channels: list[tuple[str, str, int]]) -> str:
+    """Generate an index page linking to the pages of several channels.
+
+    ``channels`` contains a (name, file name, recurring program count) tuple for
+    each channel.
+    """
+    template = get_environment().get_template("index.html")
+    return template.render(channels=channels, assets=asset_names())
+
+
+def mark_program_rows(
+    by_weekday: dict[int, list[tuple[str, str, set[datetime.date]]]],
+    week_dates: dict[int, list[date | None]],
+) -> dict[int, list[tuple[str, str, tuple[bool | None, ...]]]]:
+    """Sort program rows and mark the date columns each program occurs on.
+
+    The dates of each program are replaced with a tuple aligned with the
+    weekday's ``week_dates``, holding whether the program occurs on that date,
+    or None for a column without a date. This keeps set lookups of dates out of
+    the template.
+    """
+    return {
+        weekday: [
+            (
+                time_str,
+                name,
+                tuple(
+                    date in prog_dates if date else None for date in week_dates[weekday]
+                ),
+            )
+            for time_str, name, prog_dates in sorted(programs)
+        ]
+        for weekday, programs in by_weekday.items()
+    }
+
+
+def schedule_index(
+    by_weekday: dict[int, list[tuple[str, str, tuple[bool | None, ...]]]],
+    week_dates: dict[int, list[date | None]],
+) -> dict:
+    """Build the row index embedded in the page for ``schedule.js``.
+
+    Rows are numbered in document order over all weekday sections, using the
+    marked rows of `mark_program_rows`. The index has:
+
+    - ``dates``: the table column of each ISO date
+    - ``weekdays``: the first and past-the-last row of each ISO weekday
+    - ``minutes``: the start time of each row as minutes from midnight
+    - ``marks``: the marked columns of each row, as lists rather than bitmasks
+      since JavaScript bitwise operators only handle 32 columns
+    - ``programs``: the rows of each program
+
+    With it, the script highlights the current time and hides programs without
+    querying and parsing the whole table.
+    """
+    index = {"dates": {}, "weekdays": {}, "minutes": [], "marks": [], "programs": {}}
+    for weekday, programs in by_weekday.items():
+        if not programs:
+            continue
+        for column, day in enumerate(week_dates[weekday], start=1):
+            if day:
+                index["dates"][day.isoformat()] = column
+        first_row = len(index["minutes"])
+        for row, (time_str, name, marks) in enumerate(programs, start=first_row):
+            hours, minutes = time_str.split(":")
+            index["minutes"].append(int(hours) * 60 + int(minutes))
+            index["marks"].append(
+                [column for column, marked in enumerate(marks, 1) if marked],
+            )
+            index["programs"].setdefault(name, []).append(row)
+        index["weekdays"][weekday + 1] = [first_row, len(index["minutes"])]
+    return index
+
 
 def generate_html_table(
     by_weekday: dict[int, list[tuple[str, str, set[datetime.date]]]],
     files: list[Path],
     *,
     tz_name: str | None = None,
+    file_dates: Collection[date] | None = None,
 ) -> str:
-    """Generate HTML table for recurring programs using Jinja2 template."""
-    # Get all unique dates from files
-    file_dates = {
-        datetime.strptime(
-            f.parent.parent.name + f.parent.name + f.stem + "+0000",
-            "%Y%m%d%z",
-        ).date()
-        for f in files
-    }
+    """Generate HTML table for recurring programs using Jinja2 template.
+
+    ``file_dates`` can be given to reuse dates already parsed from the paths in
+    ``files``, e.g. ``FileDateIndex.dates`` from the schedule analyzer. The
+    JavaScript and CSS assets referenced by the page are not written; use
+    `write_assets` for that.
+    """
+    template = get_environment().get_template("schedule.html")
+    return template.render(
+        schedule_context(by_weekday, files, tz_name=tz_name, file_dates=file_dates),
+    )
+
+
+def stream_html_table(
+    by_weekday: dict[int, list[tuple[str, str, set[datetime.date]]]],
+    files: list[Path],
+    *,
+    tz_name: str | None = None,
+    file_dates: Collection[date] | None = None,
+) -> Iterator[str]:
+    """Generate the HTML of `generate_html_table` in chunks as it is rendered.
+
+    Useful for writing a large page to a file or an HTTP response without
+    holding the whole document in memory.
+    """
+    template = get_environment().get_template("schedule.html")
+    return template.generate(
+        schedule_context(by_weekday, files, tz_name=tz_name, file_dates=file_dates),
+    )
+
+
+def schedule_context(
+    by_weekday: dict[int, list[tuple[str, str, set[datetime.date]]]],
+    files: list[Path],
+    *,
+    tz_name: str | None = None,
+    file_dates: Collection[date] | None = None,
+) -> dict:
+    """Return the variables for rendering the ``schedule.html`` template."""
+    if file_dates is None:
+        # Get all unique dates from files
+        file_dates = {
+            datetime.strptime(
+                f.parent.parent.name + f.parent.name + f.stem + "+0000",
+                "%Y%m%d%z",
+            ).date()
+            for f in files
+        }
 
     # Set default timezone if none specified
     tz_name = tz_name or "Europe/Helsinki"
@@ -31,7 +467,8 @@ def generate_html_table(
     tz = ZoneInfo(tz_name)
     today = datetime.now(tz).date()
     current_monday = today - timedelta(days=today.weekday())
-    last_data_monday = max(file_dates) - timedelta(days=max(file_dates).weekday())
+    last_data_date = max(file_dates)
+    last_data_monday = last_data_date - timedelta(days=last_data_date.weekday())
 
     # We want to show 5 weeks including the current week and going forward to last data
     # If we don't have enough future weeks, we'll backfill with past weeks
@@ -51,23 +488,12 @@ def generate_html_table(
 
     max_dates = weeks_to_show  # Always 5 weeks
 
-    # Set up Jinja2 environment
-    template_dir = Path(__file__).parent
-    env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(template_dir),
-        autoescape=True,
-    )
-
-    # Copy static files
-    for static_file in ["schedule.js", "translations.js", "style.css"]:
-        source = template_dir / static_file
-        dest = Path(static_file)
-        dest.write_text(source.read_text())
-
-    template = env.get_template("schedule.html")
-    return template.render(
-        by_weekday=by_weekday,
-        week_dates=week_dates,
-        max_dates=max_dates,
-        tz_name=tz_name,
-    )
+    marked = mark_program_rows(by_weekday, week_dates)
+    return {
+        "by_weekday": marked,
+        "week_dates": week_dates,
+        "max_dates": max_dates,
+        "tz_name": tz_name,
+        "schedule_index": schedule_index(marked, week_dates),
+        "assets": asset_names(),
+    }
@@ -6,15 +6,20 @@ window.toggleDrawer = toggleDrawer;
 window.toggleProgram = toggleProgram;
 window.setLanguage = setLanguage;
 
-function setLanguage(lang) {
-    localStorage.setItem('preferredLanguage', lang);
-    // Retranslate all elements
+function translatePage() {
+    // Translate all elements with data-i18n and data-i18n-title attributes
     document.querySelectorAll('[data-i18n]').forEach((el) => {
         el.textContent = getTranslation(el.dataset.i18n);
     });
     document.querySelectorAll('[data-i18n-title]').forEach((el) => {
         el.title = getTranslation(el.dataset.i18nTitle);
     });
+}
+
+function setLanguage(lang) {
+    localStorage.setItem('preferredLanguage', lang);
+    // Retranslate all elements
+    translatePage();
     // Update program actions
     document.querySelectorAll('.program-cell').forEach((cell) => {
         const isHidden = cell.closest('tr').classList.contains('hidden');
@@ -37,6 +42,8 @@ function getCurrentTimeInfo() {
 
 // Initialize when page loads
 document.addEventListener('DOMContentLoaded', () => {
+    translatePage();
+
     // Set initial action text for all program cells
     document.querySelectorAll('.program-cell').forEach((cell) => {
         const action = getTranslation('hide');
@@ -49,7 +56,10 @@ document.addEventListener('DOMContentLoaded', () => {
         const hiddenPrograms = JSON.parse(
             localStorage.getItem('hiddenPrograms') || '[]'
         );
-        hiddenPrograms.forEach((program) => toggleProgram(program, false));
+        // Highlight the current time once after hiding all the programs
+        hiddenPrograms.forEach((program) =>
+            toggleProgram(program, false, false)
+        );
         updateHiddenCount();
     }
 
@@ -90,19 +100,90 @@ function saveHiddenPrograms() {
     updateHiddenCount();
 }
 
-function toggleProgram(programName, save = true) {
-    // Update all program cells with correct action text
-    document
-        .querySelectorAll(`td[data-program='${programName}']`)
-        .forEach((cell) => {
-            const isHidden = !cell.closest('tr').classList.contains('hidden');
-            const action = getTranslation(isHidden ? 'hide' : 'show');
-            cell.setAttribute('data-action', action);
-        });
-    const selector = `tr[data-program='${programName}']`;
-    const rows = document.querySelectorAll(selector);
+// Row index of the schedule table, built once per table
+let scheduleIndex = null;
+
+function getScheduleIndex() {
+    const table = document.querySelector('table');
+    if (!table) {
+        return null;
+    }
+    if (scheduleIndex?.table !== table) {
+        // Use the index embedded in the page, or build it from the table
+        const embedded = document.getElementById('schedule-index');
+        const data = embedded
+            ? JSON.parse(embedded.textContent)
+            : indexTable(table);
+        const rows = [];
+        for (const tbody of table.tBodies) {
+            rows.push(...tbody.rows);
+        }
+        scheduleIndex = {
+            ...data,
+            table,
+            rows,
+            column: -1,
+            currentRow: null,
+        };
+    }
+    return scheduleIndex;
+}
+
+function indexTable(table) {
+    const index = {
+        dates: {},
+        weekdays: {},
+        minutes: [],
+        marks: [],
+        programs: {},
+    };
+    table.querySelectorAll('th[data-date]').forEach((th) => {
+        if (th.dataset.date) {
+            index.dates[th.dataset.date] = th.cellIndex;
+        }
+    });
+    for (const tbody of table.tBodies) {
+        const firstRow = index.minutes.length;
+        for (const row of tbody.rows) {
+            const [hours, minutes] = row.cells[0].textContent
+                .trim()
+                .split(':')
+                .map(Number);
+            const marks = [];
+            for (const cell of row.cells) {
+                if (cell.classList.contains('marked')) {
+                    marks.push(cell.cellIndex);
+                }
+            }
+            const { program } = row.dataset;
+            index.programs[program] ??= [];
+            index.programs[program].push(index.minutes.length);
+            index.minutes.push(hours * 60 + minutes);
+            index.marks.push(marks);
+        }
+        index.weekdays[tbody.dataset.isoWeekday] = [
+            firstRow,
+            index.minutes.length,
+        ];
+    }
+    return index;
+}
+
+function toggleProgram(programName, save = true, highlight = true) {
+    const index = getScheduleIndex();
+    const rows = (index?.programs[programName] ?? []).map(
+        (id) => index.rows[id]
+    );
+    if (!rows.length) {
+        return;
+    }
     const isHidden = !rows[0].classList.contains('hidden');
-    rows.forEach((row) => row.classList.toggle('hidden'));
+    // Update the program cells with correct action text
+    const action = getTranslation(isHidden ? 'hide' : 'show');
+    rows.forEach((row) => {
+        row.lastElementChild.setAttribute('data-action', action);
+        row.classList.toggle('hidden', isHidden);
+    });
 
     const hiddenList = document.getElementById('hidden-programs');
     const listItem = document.getElementById(`hidden-${programName}`);
@@ -127,76 +208,69 @@ function toggleProgram(programName, save = true) {
     }
 
     // Update time highlight after visibility changes
-    updateTimeHighlight();
+    if (highlight) {
+        updateTimeHighlight();
+    }
 }
 
-export function updateTimeHighlight() {
-    // Remove existing highlights
-    document
-        .querySelectorAll('.current-time, .current-week')
-        .forEach((el) => el.classList.remove('current-time', 'current-week'));
-
-    const { options, now, today } = getCurrentTimeInfo();
-
-    // Find today's column
-    const todayColumn = document.querySelector(`th[data-date="${today}"]`);
-    if (!todayColumn) {
+function setColumnHighlight(rows, column, force) {
+    if (column < 0) {
         return;
     }
+    rows.forEach((row) => {
+        row.children[column]?.classList.toggle('current-week', force);
+    });
+}
 
-    // Get column index
-    const columnIndex = todayColumn
-        ? Array.from(todayColumn.parentElement.children).indexOf(todayColumn)
-        : -1;
+function findCurrentRow(index, [start, end], column, currentTime) {
+    const { rows, minutes, marks } = index;
+    // Rows of a weekday are sorted by time, so find the first row after now
+    let low = start;
+    let high = end;
+    while (low < high) {
+        const middle = (low + high) >> 1;
+        if (minutes[middle] <= currentTime) {
+            low = middle + 1;
+        } else {
+            high = middle;
+        }
+    }
+    // and walk back to the most recent visible program marked for today
+    for (let id = low - 1; id >= start; id--) {
+        const marked = marks[id].includes(column);
+        if (marked && !rows[id].classList.contains('hidden')) {
+            return rows[id];
+        }
+    }
+    return null;
+}
 
-    // Highlight today's column if found
-    if (columnIndex >= 0) {
-        document.querySelectorAll('tr').forEach((row) => {
-            const cell = row.children[columnIndex];
-            if (cell?.tagName === 'TD') {
-                cell.classList.add('current-week');
-            }
-        });
+export function updateTimeHighlight() {
+    const index = getScheduleIndex();
+    if (!index) {
+        return;
     }
+    const { options, now, today, weekday } = getCurrentTimeInfo();
 
-    // Get current weekday from getCurrentTimeInfo
-    const { weekday } = getCurrentTimeInfo();
+    // Move the highlight to today's column only when the date changes
+    const column = index.dates[today] ?? -1;
+    if (column !== index.column) {
+        setColumnHighlight(index.rows, index.column, false);
+        setColumnHighlight(index.rows, column, true);
+        index.column = column;
+    }
 
     // Find the current or most recent program row
-    const timeStr = now.toLocaleTimeString('sv', options);
-    const [hours, minutes] = timeStr.split(':').map(Number);
-    const currentTime = hours * 60 + minutes;
-    let lastMatchingRow = null;
-
-    // Only process rows if we found today's column
-    if (todayColumn) {
-        const tbody = document.querySelector(
-            `tbody[data-iso-weekday="${weekday}"]`
-        );
-        if (!tbody) return;
-
-        tbody.querySelectorAll('tr').forEach((row) => {
-            const timeCell = row.querySelector('td:first-child');
-            const programCell = row.children[columnIndex];
-            if (timeCell && programCell?.classList.contains('marked')) {
-                const [hours, minutes] = timeCell.textContent
-                    .trim()
-                    .split(':')
-                    .map(Number);
-                const rowTime = hours * 60 + minutes;
-                const nextRow = row.nextElementSibling;
-
-                if (
-                    rowTime <= currentTime &&
-                    !row.classList.contains('hidden')
-                ) {
-                    lastMatchingRow = row;
-                }
-            }
-        });
-
-        if (lastMatchingRow) {
-            lastMatchingRow.classList.add('current-time');
-        }
+    let currentRow = null;
+    const range = index.weekdays[weekday];
+    if (column >= 0 && range) {
+        const timeStr = now.toLocaleTimeString('sv', options);
+        const [hours, minutes] = timeStr.split(':').map(Number);
+        currentRow = findCurrentRow(index, range, column, hours * 60 + minutes);
+    }
+    if (currentRow !== index.currentRow) {
+        index.currentRow?.classList.remove('current-time');
+        currentRow?.classList.add('current-time');
+        index.currentRow = currentRow;
     }
 }
@@ -198,4 +198,96 @@ describe('Schedule highlighting', () => {
         const timeCell = highlightedRows[0].querySelector('td:first-child');
         expect(timeCell.textContent).toBe('21:04');
     });
+
+    it('should move the highlight when the current program is hidden', () => {
+        // Arrange
+        const testDate = new Date('2024-11-30T23:00:00'); // Saturday
+        jest.setSystemTime(testDate);
+        document.body.insertAdjacentHTML(
+            'beforeend',
+            '<ul id="hidden-programs"></ul><span id="hidden-count"></span>'
+        );
+        updateTimeHighlight();
+
+        // Act
+        window.toggleProgram('Keinuva talo - Mika Kauhanen', false);
+
+        // Assert
+        const highlightedRows = document.querySelectorAll('tr.current-time');
+        expect(highlightedRows).toHaveLength(1);
+        const timeCell = highlightedRows[0].querySelector('td:first-child');
+        expect(timeCell.textContent).toBe('21:35');
+    });
+
+    it('should move the highlights of a table without an embedded index', () => {
+        // Arrange
+        expect(document.getElementById('schedule-index')).toBeNull();
+        jest.setSystemTime(new Date('2024-11-30T23:00:00')); // Saturday
+        updateTimeHighlight();
+
+        // Act
+        jest.setSystemTime(new Date('2024-12-08T21:10:00')); // Sunday
+        updateTimeHighlight();
+
+        // Assert
+        const markedCells = document.querySelectorAll('.current-week');
+        expect(markedCells).toHaveLength(11);
+        markedCells.forEach((cell) => {
+            expect(cell.cellIndex).toBe(2); // Third column 7.12.-8.12.
+        });
+        const highlightedRows = document.querySelectorAll('tr.current-time');
+        expect(highlightedRows).toHaveLength(1);
+        const timeCell = highlightedRows[0].querySelector('td:first-child');
+        expect(timeCell.textContent).toBe('21:04');
+
+        // Act
+        jest.setSystemTime(new Date('2024-12-15T21:10:00')); // Sunday
+        updateTimeHighlight();
+
+        // Assert
+        expect(document.querySelectorAll('.current-week')).toHaveLength(0);
+        expect(document.querySelectorAll('.current-time')).toHaveLength(0);
+    });
+
+    it('should use the index embedded in the page', () => {
+        // Arrange
+        const testDate = new Date('2024-12-08T21:10:00'); // Sunday
+        jest.setSystemTime(testDate);
+        const index = {
+            dates: { '2024-12-01': 1, '2024-12-08': 2 },
+            weekdays: { 6: [0, 5], 7: [5, 11] },
+            minutes: [
+                1260, 1265, 1295, 1355, 1420, 1260, 1264, 1291, 1339, 1400,
+                1420,
+            ],
+            marks: [
+                [1],
+                [1, 2],
+                [1, 2],
+                [1, 2],
+                [2],
+                [1, 2],
+                [1, 2],
+                [1, 2],
+                [1, 2],
+                [1, 2],
+                [1, 2],
+            ],
+            programs: {},
+        };
+        const script = document.createElement('script');
+        script.type = 'application/json';
+        script.id = 'schedule-index';
+        script.textContent = JSON.stringify(index);
+        document.body.appendChild(script);
+
+        // Act
+        updateTimeHighlight();
+
+        // Assert
+        const highlightedRows = document.querySelectorAll('tr.current-time');
+        expect(highlightedRows).toHaveLength(1);
+        const timeCell = highlightedRows[0].querySelector('td:first-child');
+        expect(timeCell.textContent).toBe('21:04');
+    });
 });
@@ -1 +1,221 @@
 """Tests for HTML generator module."""
+
+from __future__ import annotations
+
+import gzip
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from templates.html_generator import (
+    asset_names,
+    build_assets,
+    bundle_javascript,
+    generate_html_table,
+    generate_index_html,
+    mark_program_rows,
+    schedule_index,
+    stream_html_table,
+    trim_css,
+    trim_javascript,
+    write_assets,
+)
+
+
+def test_generate_index_html_links_channels() -> None:
+    """Test that the index page links to each channel page."""
+    html = generate_index_html(
+        [("yle-radio-1", "yle-radio-1.html", 42), ("yle-x3m", "yle-x3m.html", 7)],
+    )
+    assert '<a href="yle-radio-1.html">yle-radio-1</a> (42)' in html
+    assert '<a href="yle-x3m.html">yle-x3m</a> (7)' in html
+    assert f'href="{asset_names()["style.css"]}"' in html
+
+
+def test_write_assets_writes_hashed_and_compressed_files(tmp_path: Path) -> None:
+    """Test that assets are written once under content-hashed names."""
+    output_dir = tmp_path / "site"
+    written = write_assets(output_dir)
+
+    for source, (name, body) in build_assets().items():
+        assert name.startswith(source.split(".")[0] + ".")
+        assert (output_dir / name).read_bytes() == body
+        assert gzip.decompress((output_dir / f"{name}.gz").read_bytes()) == body
+    assert len(written) >= 2 * len(build_assets())
+    assert write_assets(output_dir) == []
+
+    stale = [output_dir / "style.0123456789ab.css", output_dir / "schedule.js"]
+    stale.append(output_dir / "style.0123456789ab.css.gz")
+    for path in stale:
+        path.write_text("")
+    write_assets(output_dir)
+    assert [path.exists() for path in stale] == [False, True, False]
+
+
+def test_bundle_javascript_inlines_imported_modules() -> None:
+    """Test that the bundled script takes its imports from wrapped modules."""
+    bundle = bundle_javascript("schedule.js")
+
+    assert "import " not in bundle
+    assert "export " not in bundle
+    assert "const { getTranslation } = __translations_js;" in bundle
+    assert "return { translations, getTranslation };" in bundle
+
+
+def test_bundle_javascript_handles_import_forms(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that aliased and multi-line imports of either quote style are bundled."""
+    (tmp_path / "a.js").write_text(
+        'import {\n  b as renamed,\n  c,\n} from "./b.js"\nrenamed(c);\n',
+    )
+    (tmp_path / "b.js").write_text(
+        "export async function b() {}\nexport const c = 1;\n",
+    )
+    monkeypatch.setattr("templates.html_generator.TEMPLATE_DIR", tmp_path)
+
+    assert bundle_javascript("a.js") == (
+        "const __b_js = (() => {\nasync function b() {}\nconst c = 1;\n"
+        "return { b, c };\n})();\n"
+        "const { b: renamed, c } = __b_js;\nrenamed(c);\n"
+    )
+
+
+def test_bundle_javascript_rejects_unsupported_statements(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that imports and exports the bundler can't rewrite are reported."""
+    (tmp_path / "a.js").write_text("const a = 1;\nexport default a;\n")
+    monkeypatch.setattr("templates.html_generator.TEMPLATE_DIR", tmp_path)
+
+    with pytest.raises(ValueError, match=r"export default a;"):
+        bundle_javascript("a.js")
+
+
+def test_trim_javascript_keeps_literals_intact() -> None:
+    """Test that comments and indentation go but literals are copied as they are."""
+    source = (
+        "/* Header\n   comment */\n"
+        "function f(name) {\n"
+        "    // A comment line\n"
+        "    const url = 'http://example.com'; // trailing comment\n"
+        "    const html = `<ul>\n"
+        "        <li>${name.replace(/\\/\\//g, '')}</li>\n"
+        "        // not a comment\n"
+        "    </ul>`;\n"
+        "\n"
+        '    return url /* inline */ + html + "  //" / 2;\n'
+        "}\n"
+    )
+    assert trim_javascript(source) == (
+        "function f(name) {\n"
+        "const url = 'http://example.com';\n"
+        "const html = `<ul>\n"
+        "        <li>${name.replace(/\\/\\//g, '')}</li>\n"
+        "        // not a comment\n"
+        "    </ul>`;\n"
+        'return url + html + "  //" / 2;\n'
+        "}"
+    )
+
+
+def test_trim_css_removes_comments_and_whitespace() -> None:
+    """Test that trimmed CSS keeps values, strings and selectors intact."""
+    css = (
+        "/* rows */\ntr > td,\nth :hover {\n    margin: 0 auto;\n"
+        '    content: "a:  b; }";\n    color: red;\n}\n'
+    )
+    assert (
+        trim_css(css) == 'tr>td,th :hover{margin:0 auto;content:"a:  b; }";color:red}'
+    )
+
+
+def test_mark_program_rows_aligns_dates_with_columns() -> None:
+    """Test that program dates become sorted rows of column marks."""
+    mondays = [date(2024, 12, 2), date(2024, 12, 9), date(2024, 12, 16)]
+    by_weekday = {
+        0: [
+            ("21:00", "Yle Uutiset", {mondays[0], mondays[2]}),
+            ("06:00", "Aamu", set(mondays)),
+        ],
+    }
+    assert mark_program_rows(by_weekday, {0: [*mondays, None]}) == {
+        0: [
+            ("06:00", "Aamu", (True, True, True, None)),
+            ("21:00", "Yle Uutiset", (True, False, True, None)),
+        ],
+    }
+
+
+def test_generate_html_table_marks_program_dates() -> None:
+    """Test that checkmarks are rendered for the dates a program occurs on."""
+    today = datetime.now(tz=timezone.utc).date()
+    monday = today - timedelta(days=today.weekday())
+    files = [Path(f"{monday:%Y/%m/%d}.yaml")]
+    by_weekday = {0: [("21:00", "Yle Uutiset", {monday})]}
+
+    html = generate_html_table(by_weekday, files, tz_name="UTC")
+
+    assert html.count('<td class="marked">✓</td>') == 1
+    assert html.count('<td class=""></td>') == 4  # noqa: PLR2004
+
+
+def test_stream_html_table_matches_generate_html_table() -> None:
+    """Test that the streamed chunks add up to the fully rendered page."""
+    today = datetime.now(tz=timezone.utc).date()
+    files = [Path(f"{today:%Y/%m/%d}.yaml")]
+    by_weekday = {today.weekday(): [("06:00", "Aamu", {today})]}
+
+    chunks = list(stream_html_table(by_weekday, files, tz_name="UTC"))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == generate_html_table(by_weekday, files, tz_name="UTC")
+
+
+def test_schedule_index_numbers_rows_in_document_order() -> None:
+    """Test the row index embedded in the page for the script."""
+    mondays = [date(2024, 12, 2), date(2024, 12, 9)]
+    sundays = [date(2024, 12, 8), None]
+    by_weekday = {
+        0: [
+            ("06:00", "Aamu", (True, True)),
+            ("21:00", "Yle Uutiset", (False, True)),
+        ],
+        1: [],
+        6: [("21:00", "Yle Uutiset", (True, None))],
+    }
+
+    index = schedule_index(by_weekday, {0: mondays, 1: [], 6: sundays})
+
+    assert index == {
+        "dates": {"2024-12-02": 1, "2024-12-09": 2, "2024-12-08": 1},
+        "weekdays": {1: [0, 2], 7: [2, 3]},
+        "minutes": [360, 1260, 1260],
+        "marks": [[1, 2], [2], [1]],
+        "programs": {"Aamu": [0], "Yle Uutiset": [1, 2]},
+    }
+
+
+def test_schedule_index_lists_marked_columns_beyond_32_weeks() -> None:
+    """Test that marks of long windows don't depend on 32-bit bitmasks."""
+    mondays = [date(2024, 1, 1) + timedelta(weeks=week) for week in range(40)]
+    marks = tuple(week in (0, 31, 39) for week in range(40))
+
+    index = schedule_index({0: [("06:00", "Aamu", marks)]}, {0: mondays})
+
+    assert index["marks"] == [[1, 32, 40]]
+    assert index["dates"][mondays[-1].isoformat()] == 40  # noqa: PLR2004
+
+
+def test_generate_html_table_embeds_schedule_index() -> None:
+    """Test that the page embeds the row index as HTML-safe JSON."""
+    today = datetime.now(tz=timezone.utc).date()
+    files = [Path(f"{today:%Y/%m/%d}.yaml")]
+    by_weekday = {today.weekday(): [("06:00", "</script>", {today})]}
+
+    html = generate_html_table(by_weekday, files, tz_name="UTC")
+
+    assert '"programs":{"\\u003c/script\\u003e":[0]}' in html
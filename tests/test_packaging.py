@@ -0,0 +1,77 @@
+"""Tests for installing the package."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from test_schedule_analyzer import write_schedule_file
+
+REPOSITORY_ROOT = Path(__file__).parent.parent
+
+
+def test_installed_entry_point_serves_page(tmp_path: Path) -> None:
+    """Test that the installed package includes the server and the templates."""
+    source = tmp_path / "source"
+    source.mkdir()
+    for name in [
+        "pyproject.toml",
+        "README.rst",
+        "schedule_analyzer.py",
+        "schedule_server.py",
+    ]:
+        shutil.copy(REPOSITORY_ROOT / name, source)
+    shutil.copytree(
+        REPOSITORY_ROOT / "templates",
+        source / "templates",
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    site = tmp_path / "site"
+    subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--quiet",
+            "--no-deps",
+            "--ignore-requires-python",
+            "--target",
+            str(site),
+            str(source),
+        ],
+        check=True,
+    )
+    start = datetime.now(timezone.utc).replace(hour=18, minute=0, second=0)
+    write_schedule_file(tmp_path / "channel", start.date(), [("News", start)])
+
+    with subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            str(site / "bin" / "schedule-analyzer"),
+            "serve",
+            "-d",
+            str(tmp_path / "channel"),
+            "--port",
+            "0",
+            "--no-cache",
+        ],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(site)},
+        stderr=subprocess.PIPE,
+        text=True,
+    ) as process:
+        try:
+            output = ""
+            for line in process.stderr:
+                output += line
+                if "Serving" in line:
+                    break
+        finally:
+            process.terminate()
+
+    assert "Serving" in output, output
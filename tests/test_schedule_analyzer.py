@@ -2,15 +2,63 @@
 
 from __future__ import annotations
 
+import json
+import os
+import random
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta, timezone
+from itertools import combinations
 from pathlib import Path
 from typing import Any
 from unittest.mock import mock_open, patch
+from zoneinfo import ZoneInfo
 
+import pytest
+
+import schedule_analyzer
+from benchmarks.startup import (
+    HEAVY_MODULES,
+    STARTUP_BUDGET,
+    baseline_time,
+    import_times,
+    startup_time,
+)
 from schedule_analyzer import (
+    FileDateIndex,
+    Profiler,
+    ProgramTable,
+    ReadAhead,
+    RecurringAnalysis,
+    ScheduleCache,
+    ScheduleLoader,
+    ScheduleScanError,
+    ScheduleScanner,
+    SeriesNormalizer,
+    StartTimeDecoder,
+    analyze_channels,
     analyze_recurring_programs,
+    convert_schedule_files,
+    count_weekday_occurrences,
+    decode_datetime,
+    extract_program_table,
+    extract_programs,
+    extract_timezone,
+    file_stamp,
+    find_schedule_files,
     format_dates,
+    load_day,
+    load_schedule,
+    load_series_rules,
     normalize_program_name,
+    pack_schedule_files,
+    parse_args,
+    parse_serve_args,
+    scan_schedule_files,
+    schedule_file_date,
+    stream_json_report,
+    update_analysis,
 )
 
 # Constants for test assertions
@@ -24,7 +72,6 @@ WEEKLY_OCCURRENCES = 3
 FLEXIBLE_OCCURRENCES = 2
 
 
-
 def create_mock_schedule(programs: list[tuple[str, datetime]]) -> dict:
     """Create a mock schedule dictionary from program list."""
     return {
@@ -215,6 +262,36 @@ def test_format_dates_sequence_with_gap() -> None:
     assert format_dates(dates) == "5-19.12., 2.1."
 
 
+def test_stream_json_report_writes_records_with_iso_dates() -> None:
+    """Test JSON and NDJSON output of recurring programs."""
+    recurring = [
+        (0, 21, 0, "Uutiset", {date(2024, 1, 8), date(2024, 1, 1)}),
+        (4, 18, 30, "Älä Jätä", {date(2024, 1, 5)}),
+    ]
+    records = [
+        {
+            "weekday": 0,
+            "hour": 21,
+            "minute": 0,
+            "series": "Uutiset",
+            "dates": ["2024-01-01", "2024-01-08"],
+        },
+        {
+            "weekday": 4,
+            "hour": 18,
+            "minute": 30,
+            "series": "Älä Jätä",
+            "dates": ["2024-01-05"],
+        },
+    ]
+    array = "".join(stream_json_report(recurring))
+    lines = "".join(stream_json_report(recurring, ndjson=True)).splitlines()
+
+    assert json.loads(array) == records
+    assert [json.loads(line) for line in lines] == records
+    assert "Älä Jätä" in lines[1]
+
+
 def test_normalize_program_name_uutiset_ja_saa() -> None:
     """Test normalizing 'Yle Uutiset ja sää' to 'Yle Uutiset'."""
     assert normalize_program_name("Yle Uutiset ja sää") == "Yle Uutiset"
@@ -234,3 +311,921 @@ def test_normalize_program_name_empty() -> None:
 def test_normalize_program_name_whitespace() -> None:
     """Test normalizing strings with extra whitespace."""
     assert normalize_program_name("  Yle Uutiset ja sää  ") == "Yle Uutiset"
+
+
+SERIES_RULES = {
+    "aliases": {"Aamun uutiset": "Yle Uutiset"},
+    "patterns": [
+        (r"Yle Uutiset \d\d\.\d\d", "Yle Uutiset"),
+        (r"(?P<series>.+) \(uusinta\)", r"\g<series>"),
+    ],
+    "channels": {
+        "yle-radio-1": {
+            "aliases": {"Aamun uutiset": "Aamu"},
+            "patterns": [(r"(Kino) .+", r"\1")],
+        },
+    },
+}
+
+
+def test_series_normalizer_applies_aliases_before_patterns() -> None:
+    """Test exact aliases, the first matching pattern and channel rules."""
+    normalizer = SeriesNormalizer.from_rules(SERIES_RULES)
+    channel = SeriesNormalizer.from_rules(SERIES_RULES, "yle-radio-1")
+
+    assert normalizer(" Aamun uutiset ") == "Yle Uutiset"
+    assert normalizer("Yle Uutiset ja sää") == "Yle Uutiset"
+    assert normalizer("Yle Uutiset 18.00") == "Yle Uutiset"
+    assert normalizer("Kino Klassikko (uusinta)") == "Kino Klassikko"
+    assert normalizer("Yle Uutiset 18.00 extra") == "Yle Uutiset 18.00 extra"
+    assert channel("Aamun uutiset") == "Aamu"
+    assert channel("Kino Klassikko (uusinta)") == "Kino"
+    assert channel.fingerprint != normalizer.fingerprint
+
+
+def test_series_normalizer_memoizes_interned_names() -> None:
+    """Test that each distinct title is normalized once into a shared string."""
+    normalizer = SeriesNormalizer(patterns=[(r"(\w+) \1", r"\1")], cache_size=2)
+    first = normalizer("Ohjelma Ohjelma")
+
+    assert normalizer.combined is None  # backreferences are matched separately
+    assert first == "Ohjelma"
+    assert normalizer("Ohjelma Ohjelma") is first
+    assert normalizer.normalize.cache_info().hits == 1
+    assert normalizer("Uutiset") is normalizer(" Uutiset")
+
+
+def test_load_series_rules_from_yaml_and_toml(tmp_path: Path) -> None:
+    """Test that YAML and TOML rule files give the same rules."""
+    yaml_path = tmp_path / "series.yaml"
+    yaml_path.write_text(
+        "aliases:\n"
+        "  Aamun uutiset: Yle Uutiset\n"
+        "patterns:\n"
+        "  - match: 'Yle Uutiset \\d\\d\\.\\d\\d'\n"
+        "    replace: Yle Uutiset\n"
+        "channels:\n"
+        "  yle-radio-1:\n"
+        "    aliases:\n"
+        "      Aamun uutiset: Aamu\n",
+    )
+    toml_path = tmp_path / "series.toml"
+    toml_path.write_text(
+        "[aliases]\n"
+        '"Aamun uutiset" = "Yle Uutiset"\n'
+        "[[patterns]]\n"
+        "match = 'Yle Uutiset \\d\\d\\.\\d\\d'\n"
+        'replace = "Yle Uutiset"\n'
+        "[channels.yle-radio-1.aliases]\n"
+        '"Aamun uutiset" = "Aamu"\n',
+    )
+    broken_path = tmp_path / "broken.yaml"
+    broken_path.write_text("patterns:\n  - match: '('\n    replace: x\n")
+
+    rules = load_series_rules(yaml_path)
+
+    assert rules == load_series_rules(toml_path)
+    assert rules["patterns"] == [(r"Yle Uutiset \d\d\.\d\d", "Yle Uutiset")]
+    assert rules["channels"]["yle-radio-1"]["aliases"] == {"Aamun uutiset": "Aamu"}
+    with pytest.raises(ValueError, match="Invalid series pattern"):
+        SeriesNormalizer.from_rules(load_series_rules(broken_path))
+
+
+def test_analysis_state_requires_same_series_rules() -> None:
+    """Test that a saved analysis is only reused with the same series rules."""
+    normalizer = SeriesNormalizer.from_rules(SERIES_RULES)
+    analysis = RecurringAnalysis(normalizer)
+    analysis.add_programs(
+        [("Yle Uutiset 18.00", datetime(2024, 1, 1, 18, tzinfo=timezone.utc))],
+    )
+    state = analysis.to_json()
+
+    assert [item["series"] for item in state["start_times"]] == ["Yle Uutiset"]
+    assert RecurringAnalysis.from_json(state, normalizer).to_json() == state
+    with pytest.raises(ValueError, match="series normalization rules"):
+        RecurringAnalysis.from_json(state)
+
+
+def write_schedule_file(
+    root: Path,
+    day: date,
+    programs: list[tuple[str, datetime]],
+) -> Path:
+    """Write a schedule YAML file for ``day`` under ``root``."""
+    path = root / f"{day.year:04d}" / f"{day.month:02d}" / f"{day.day:02d}.yaml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = ["data:", "  channel:", "    programmes:"]
+    for name, start_time in programs:
+        lines.append(f"      - series: {name}")
+        lines.append(f"        start_time: '{start_time.isoformat()}'")
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_program_table_columns() -> None:
+    """Test that the program table derives local dates and times of day."""
+    summer = timezone(timedelta(hours=3))
+    winter = timezone(timedelta(hours=2))
+    programs = [
+        ("News", datetime(2024, 3, 30, 23, 30, tzinfo=winter)),
+        ("Late", datetime(2024, 3, 31, 0, 15, 30, tzinfo=summer)),
+        ("News", datetime(2024, 3, 31, 21, 30, tzinfo=summer)),
+    ]
+    table = ProgramTable.from_programs(programs)
+    assert table.series == ["News", "Late"]
+    assert list(table.series_ids) == [0, 1, 0]
+    assert list(table.utc_offsets) == [7200, 10800, 10800]
+    assert list(table.weekdays) == [5, 6, 6]
+    assert list(table.seconds_of_day) == [84600, 930, 77400]
+    assert [datetime.fromordinal(d).date() for d in table.date_ordinals] == [
+        start_time.date() for _, start_time in programs
+    ]
+    assert table.programs() == programs
+
+
+def test_start_time_decoder_matches_datetime_across_dst() -> None:
+    """Test that decoded start times equal those of parsed datetimes."""
+    helsinki = ZoneInfo("Europe/Helsinki")
+    start_times = [
+        (datetime(2024, 3, 30, 22, tzinfo=helsinki) + timedelta(minutes=m))
+        .astimezone(helsinki)
+        .isoformat()
+        for m in range(0, 8 * 60, 25)
+    ] + [
+        (datetime(2024, 10, 27, tzinfo=timezone.utc) + timedelta(minutes=m))
+        .astimezone(helsinki)
+        .isoformat()
+        for m in range(0, 6 * 60, 35)
+    ]
+    start_times += [
+        "2024-01-01T00:00:00Z",
+        "2024-01-01 23:59:59-05:30",
+        "2024-01-01T12:30:00",
+        "2024-01-01T12:30+02:00",
+        "2024-01-01T12:30:15.750+02:00",
+        "20240101T123000+0200",
+        "1969-12-31T23:59:59+14:00",
+    ]
+    decoder = StartTimeDecoder()
+
+    decoded = [decoder.decode(start_time) for start_time in start_times]
+
+    assert decoded == [
+        decode_datetime(datetime.fromisoformat(start_time))
+        for start_time in start_times
+    ]
+    assert {offset for _, offset in decoded[:20]} == {7200, 10800}
+    for invalid in ["2024-02-30T12:00:00+02:00", "2024-01-01T24:00:00+02:00"]:
+        with pytest.raises(ValueError, match=r"out of range|must be in"):
+            decoder.decode(invalid)
+
+
+def test_extract_program_table_matches_extract_programs() -> None:
+    """Test that the table of programs equals one built from datetimes."""
+    schedule = create_mock_schedule(
+        [
+            ("Aamu", datetime(2024, 3, 31, 2, 30, tzinfo=timezone(timedelta(hours=2)))),
+            ("Aamu", datetime(2024, 3, 31, 4, 30, tzinfo=timezone(timedelta(hours=3)))),
+            ("Yö", datetime(2024, 4, 1, 0, 5, tzinfo=timezone(timedelta(hours=3)))),
+        ],
+    )
+
+    table = extract_program_table(schedule)
+
+    assert table.programs() == extract_programs(schedule)
+    assert list(table.weekdays) == [6, 6, 0]
+
+
+def test_schedule_cache_serves_unchanged_files(tmp_path: Path) -> None:
+    """Test that a warm cache returns programs without reparsing the file."""
+    start = datetime(2024, 1, 1, 18, 0, tzinfo=timezone(timedelta(hours=2)))
+    path = write_schedule_file(tmp_path / "data", start.date(), [("News", start)])
+    with ScheduleCache(tmp_path / "cache") as cache:
+        tz_name, programs = load_day(path, cache)
+        assert (tz_name, programs.programs()) == ("Europe/Helsinki", [("News", start)])
+    with (
+        ScheduleCache(tmp_path / "cache") as cache,
+        patch(
+            "schedule_analyzer.load_schedule",
+        ) as mock_load,
+    ):
+        tz_name, programs = load_day(path, cache)
+        assert (tz_name, programs.programs()) == ("Europe/Helsinki", [("News", start)])
+        mock_load.assert_not_called()
+        assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_schedule_cache_reparses_modified_files(tmp_path: Path) -> None:
+    """Test that a changed file size invalidates its cache entry."""
+    start = datetime(2024, 1, 1, 18, 0, tzinfo=timezone.utc)
+    later = start + timedelta(hours=1)
+    path = write_schedule_file(tmp_path / "data", start.date(), [("News", start)])
+    with ScheduleCache(tmp_path / "cache") as cache:
+        load_day(path, cache)
+        write_schedule_file(
+            tmp_path / "data",
+            start.date(),
+            [("News", start), ("Sports", later)],
+        )
+        programs = load_day(path, cache)[1].programs()
+        assert programs == [("News", start), ("Sports", later)]
+        assert cache.misses == 2  # noqa: PLR2004
+
+
+def test_pyyaml_loader_matches_ruamel(tmp_path: Path) -> None:
+    """Test that the PyYAML backend resolves plain scalars like ruamel.yaml."""
+    pytest.importorskip("yaml")
+    path = tmp_path / "scalars.yaml"
+    path.write_text(
+        "bool: [yes, No, on, OFF, y, true, False]\n"
+        "int: [012, 0o17, 0x1f, 1_000, 1:30, 0b101, -0]\n"
+        "float: [1.5, .5, 1e3, .inf, 1:30.5]\n"
+        "time: [2024-01-01, 2024-01-01T10:00:00+02:00, 'Yle Uutiset ja sää']\n",
+    )
+    assert ScheduleLoader("pyyaml").load(path) == ScheduleLoader("ruamel").load(path)
+
+
+SCANNED_SCHEDULE = """\
+# Scraped schedule
+metadata:
+  timezone: Europe/Helsinki
+  scraped: 2024-01-01T00:00:00+02:00
+data:
+  yle-radio-1:
+    id: 57
+    programmes:
+    - title: 'Ykkösaamu: ''Lauantai'''
+      series: "Ykkösaamu"
+      start_time: '2024-01-06T06:00:00+02:00'  # morning
+      description: |
+        Keskustelua.
+
+        - title: 'not a programme'
+      images:
+        - url: https://example.com/1.jpg
+          size: [640, 480]
+
+    -   title: Yle Uutiset ja sää
+        start_time: "2024-01-06T07:00:00+02:00"
+        series: yes
+        duration: 180
+  yle-radio-2:
+    programmes: []
+"""
+
+
+@pytest.mark.parametrize(
+    ("document", "scannable"),
+    [
+        (SCANNED_SCHEDULE, True),
+        (SCANNED_SCHEDULE.replace("+02:00'  #", "'  #"), True),
+        (SCANNED_SCHEDULE.replace('"Ykkösaamu"', "12:30"), True),
+        (SCANNED_SCHEDULE.replace("''Lauantai'''", "\n  Aamu'"), False),
+        (SCANNED_SCHEDULE.replace('"Ykkösaamu"', '"Ykkösaamu\\t"'), False),
+        (SCANNED_SCHEDULE.replace('"Ykkösaamu"', "!!str 123"), False),
+        (SCANNED_SCHEDULE.replace("- title:", "- &first title:"), False),
+        (SCANNED_SCHEDULE.replace("    id: 57", "    id: 'a\n  b'"), False),
+        (SCANNED_SCHEDULE.replace("    id: 57", "    id: [1,\n      2]"), False),
+    ],
+)
+def test_schedule_scanner_matches_full_parse(
+    tmp_path: Path,
+    document: str,
+    *,
+    scannable: bool,
+) -> None:
+    """Test that scanned fields equal the full parse or the scanner falls back."""
+    path = tmp_path / "01.yaml"
+    path.write_text(document)
+    full = ScheduleLoader("ruamel").load(path)
+    if scannable:
+        scanned = ScheduleScanner(path.read_bytes()).scan()
+        assert scanned["data"].keys() == {"yle-radio-1"}
+    else:
+        with pytest.raises(ScheduleScanError):
+            ScheduleScanner(path.read_bytes()).scan()
+        scanned = ScheduleLoader("scan").load(path)
+        assert scanned == full
+    assert extract_timezone(scanned) == extract_timezone(full)
+    assert extract_programs(scanned) == extract_programs(full)
+
+
+def test_schedule_scanner_keeps_only_used_fields() -> None:
+    """Test that the scanner prunes the schedule to the fields used."""
+    assert ScheduleScanner(SCANNED_SCHEDULE.encode()).scan() == {
+        "metadata": {"timezone": "Europe/Helsinki"},
+        "data": {
+            "yle-radio-1": {
+                "programmes": [
+                    {
+                        "title": "Ykkösaamu: 'Lauantai'",
+                        "series": "Ykkösaamu",
+                        "start_time": "2024-01-06T06:00:00+02:00",
+                    },
+                    {
+                        "title": "Yle Uutiset ja sää",
+                        "start_time": "2024-01-06T07:00:00+02:00",
+                        "series": "yes",
+                    },
+                ],
+            },
+        },
+    }
+
+
+@pytest.mark.parametrize("sidecar_format", ["json", "msgpack"])
+def test_convert_writes_sidecars_used_until_stale(
+    tmp_path: Path,
+    sidecar_format: str,
+) -> None:
+    """Test that sidecar files are loaded instead of YAML files until outdated."""
+    if sidecar_format == "msgpack":
+        pytest.importorskip("msgpack")
+    start = datetime(2024, 1, 1, 18, 0, tzinfo=timezone.utc)
+    path = write_schedule_file(tmp_path, start.date(), [("News", start)])
+    schedule = ScheduleLoader("ruamel").load(path)
+
+    assert convert_schedule_files(tmp_path, sidecar_format) == (1, 0)
+    assert convert_schedule_files(tmp_path, sidecar_format) == (0, 0)
+    loader = ScheduleLoader(sidecar_format)
+    with patch.object(loader, "parse_yaml") as mock_parse_yaml:
+        assert loader.load(path) == schedule
+        mock_parse_yaml.assert_not_called()
+
+    sidecar_mtime_ns = path.with_suffix(f".{sidecar_format}").stat().st_mtime_ns
+    os.utime(path, ns=(sidecar_mtime_ns + 1, sidecar_mtime_ns + 1))
+    with patch.object(loader, "parse_yaml", return_value={}) as mock_parse_yaml:
+        assert loader.load(path) == {}
+        mock_parse_yaml.assert_called_once_with(path.read_bytes())
+
+
+def test_schedule_cache_evicts_files_outside_window(tmp_path: Path) -> None:
+    """Test that entries for files no longer analyzed are evicted."""
+    start = datetime(2024, 1, 1, 18, 0, tzinfo=timezone.utc)
+    old = write_schedule_file(tmp_path, start.date(), [("News", start)])
+    new = write_schedule_file(
+        tmp_path,
+        start.date() + timedelta(days=1),
+        [("News", start + timedelta(days=1))],
+    )
+    with ScheduleCache(tmp_path / "cache") as cache:
+        analyze_recurring_programs([new, old], cache=cache)
+        assert cache.evict([new], [tmp_path]) == 1
+        old.unlink()
+        assert cache.evict([new], [tmp_path]) == 0
+
+
+def test_schedule_cache_shared_by_channels(tmp_path: Path) -> None:
+    """Test that runs for different channels keep each other's cache entries."""
+    channels = [tmp_path / "channel-0", tmp_path / "channel-1"]
+    files = {channel: write_weekly_schedules(channel, 3) for channel in channels}
+    for _ in range(2):
+        for channel in channels:
+            with ScheduleCache(tmp_path / "cache") as cache:
+                analyze_recurring_programs(files[channel], cache=cache)
+                cache.evict(files[channel], [channel])
+    assert (cache.hits, cache.misses) == (3, 0)
+
+    # Writes are committed, so another connection isn't locked out meanwhile
+    with (
+        ScheduleCache(tmp_path / "cache", rebuild=True) as cache,
+        patch("schedule_analyzer.file_digest") as mock_digest,
+    ):
+        analyze_recurring_programs(files[channels[0]], cache=cache)
+        with ScheduleCache(tmp_path / "cache") as other:
+            other.evict([], [channels[0]])
+        mock_digest.assert_not_called()
+
+
+def write_weekly_schedules(root: Path, days: int) -> list[Path]:
+    """Write ``days`` daily schedule files under ``root``, newest first."""
+    start = datetime(2024, 1, 1, 6, 0, tzinfo=timezone(timedelta(hours=2)))
+    return [
+        write_schedule_file(
+            root,
+            (start + timedelta(days=day)).date(),
+            [
+                (f"Show {hour % 3}", start + timedelta(days=day, hours=hour))
+                for hour in range(4)
+            ],
+        )
+        for day in range(days)
+    ][::-1]
+
+
+def test_packed_archive_replaces_schedule_files(tmp_path: Path) -> None:
+    """Test that a packed archive gives the same analysis as the YAML files."""
+    files = write_weekly_schedules(tmp_path, 21)
+    expected = analyze_recurring_programs(find_schedule_files(str(tmp_path)))
+    window = find_schedule_files(str(tmp_path), weeks=1)
+
+    assert pack_schedule_files(tmp_path) == (21, 0)
+    for file_path in files:
+        file_path.unlink()
+
+    assert find_schedule_files(str(tmp_path), weeks=1) == window
+    assert analyze_recurring_programs(find_schedule_files(str(tmp_path))) == expected
+    _tz_name, programs = load_day(files[0], None)
+    assert isinstance(programs.epoch_seconds, memoryview)
+    assert list(programs.series_ids) == [0, 1, 2, 0]
+
+
+def test_pack_schedule_files_appends_only_new_days(tmp_path: Path) -> None:
+    """Test that packing again leaves existing records untouched."""
+    files = write_weekly_schedules(tmp_path, 8)
+    newest = files[0].read_bytes()
+    files[0].unlink()
+    assert pack_schedule_files(tmp_path) == (7, 0)
+    packed = (tmp_path / "schedule.pack").read_bytes()
+
+    files[0].write_bytes(newest)
+    assert pack_schedule_files(tmp_path) == (1, 7)
+
+    repacked = (tmp_path / "schedule.pack").read_bytes()
+    assert repacked[24 : len(packed)] == packed[24:]
+    assert find_schedule_files(str(tmp_path)) == files
+
+
+def test_packed_archive_lists_newer_schedule_files(tmp_path: Path) -> None:
+    """Test that files added after packing are analyzed along with the archive."""
+    files = write_weekly_schedules(tmp_path, 8)
+    pack_schedule_files(tmp_path)
+    start = datetime(2024, 1, 9, 6, 0, tzinfo=timezone(timedelta(hours=2)))
+    newer = write_schedule_file(tmp_path, start.date(), [("Show 0", start)])
+
+    assert find_schedule_files(str(tmp_path)) == [newer, *files]
+    assert analyze_recurring_programs([newer, *files]) == analyze_recurring_programs(
+        scan_schedule_files(str(tmp_path)),
+    )
+
+
+def test_packed_archive_parses_changed_files(tmp_path: Path) -> None:
+    """Test that a packed day changed since packing is parsed from its file."""
+    files = write_weekly_schedules(tmp_path, 8)
+    pack_schedule_files(tmp_path)
+    start = datetime(2024, 1, 8, 6, 0, tzinfo=timezone(timedelta(hours=2)))
+    write_schedule_file(tmp_path, start.date(), [("Changed", start)])
+    stat = files[0].stat()
+    os.utime(files[0], ns=(stat.st_mtime_ns + 10**9, stat.st_mtime_ns + 10**9))
+
+    _tz_name, programs = load_day(files[0], None)
+    assert programs.series == ["Changed"]
+    assert file_stamp(files[0]) == [stat.st_mtime_ns + 10**9, files[0].stat().st_size]
+    assert load_day(files[1], None)[1].series == ["Show 0", "Show 1", "Show 2"]
+
+
+def test_load_day_reads_packed_files_by_any_path(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that removed packed files load without discovering files first."""
+    files = write_weekly_schedules(tmp_path, 8)
+    expected = load_day(files[0], None)[1].series
+    pack_schedule_files(tmp_path)
+    stamp = file_stamp(files[0])
+    for file_path in files:
+        file_path.unlink()
+    monkeypatch.setattr("schedule_analyzer.archives", {})
+    monkeypatch.chdir(tmp_path)
+    relative = files[0].relative_to(tmp_path)
+
+    assert load_day(relative, None)[1].series == expected
+    assert load_day(files[0], None)[1].series == expected
+    assert file_stamp(relative) == stamp
+    assert list(schedule_analyzer.archives) == [tmp_path.resolve()]
+
+
+def test_import_skips_heavy_dependencies() -> None:
+    """Test that importing the module doesn't import heavy dependencies.
+
+    The startup time itself is measured by ``python -m benchmarks.startup``.
+    """
+    imported = {name for name, _, _ in import_times(["-c", "import schedule_analyzer"])}
+
+    assert "schedule_analyzer" in imported
+    assert not HEAVY_MODULES & imported
+
+
+@pytest.mark.benchmark
+def test_import_stays_within_startup_budget() -> None:
+    """Test that importing the module takes at most the startup budget."""
+    baseline = baseline_time(repeat=5)
+    total, _imports = startup_time(repeat=5)
+
+    assert total < STARTUP_BUDGET * baseline
+
+
+def test_text_report_from_cache_skips_yaml_parser(tmp_path: Path) -> None:
+    """Test that a text report of cached files doesn't import any parser."""
+    monday = date(2024, 1, 1)
+    for week in range(3):
+        day = monday + timedelta(weeks=week)
+        start = datetime(day.year, day.month, day.day, 21, tzinfo=timezone.utc)
+        write_schedule_file(tmp_path / "channel", day, [("News", start)])
+    argv = [
+        "schedule_analyzer.py",
+        "-d",
+        str(tmp_path / "channel"),
+        "--loader",
+        "ruamel",
+        "--cache-dir",
+        str(tmp_path / "cache"),
+    ]
+
+    first_run = {name for name, _, _ in import_times(argv)}
+    cached_run = {name for name, _, _ in import_times(argv)}
+
+    assert "ruamel.yaml" in first_run
+    # Reading the cache needs sqlite3, but nothing else imported on demand
+    assert HEAVY_MODULES & cached_run == {"sqlite3"}
+
+
+def test_analyze_parallel_matches_serial(tmp_path: Path) -> None:
+    """Test that parsing in worker processes gives the same result as serially."""
+    start = datetime(2024, 1, 1, 6, 0, tzinfo=timezone(timedelta(hours=2)))
+    files = [
+        write_schedule_file(
+            tmp_path,
+            (start + timedelta(days=day)).date(),
+            [
+                (f"Show {hour % 5}", start + timedelta(days=day, hours=hour))
+                for hour in range(12)
+            ],
+        )
+        for day in range(14)
+    ][::-1]
+    serial = analyze_recurring_programs(files)
+    with ScheduleCache(tmp_path / "cache") as cache:
+        load_day(files[3], cache)
+        parallel = analyze_recurring_programs(files, cache=cache, jobs=2)
+    assert parallel == serial
+
+
+def reference_recurring_programs(
+    schedules: list[list[tuple[str, datetime]]],
+    min_occurrences: int,
+) -> list[tuple[int, int, int, str, set[date]]]:
+    """Group start times into slots by comparing every pair of them."""
+    start_times = defaultdict(lambda: defaultdict(set))
+    tolerance = timedelta(minutes=13)
+    for programs in schedules:
+        for series, start_time in programs:
+            time_only = start_time.replace(year=2000, month=1, day=1)
+            key = (series, start_time.weekday())
+            start_times[key][time_only, start_time.utcoffset()].add(start_time.date())
+    recurring = []
+    for (series, weekday), dates_by_time in start_times.items():
+        slot_of = {time: [time] for time in dates_by_time}
+        for first, second in combinations(sorted(dates_by_time), 2):
+            if (
+                second[0] - first[0] <= tolerance
+                and slot_of[first] is not slot_of[second]
+            ):
+                merged = slot_of[first] + slot_of[second]
+                for time in merged:
+                    slot_of[time] = merged
+        for slot in {id(slot): slot for slot in slot_of.values()}.values():
+            (earliest, _), (latest, _) = min(slot), max(slot)
+            dates = set().union(*(dates_by_time[time] for time in slot))
+            if len(dates) >= min_occurrences:
+                avg_time = earliest + (latest - earliest) / 2
+                recurring.append(
+                    (weekday, avg_time.hour, avg_time.minute, series, dates),
+                )
+    recurring.sort(key=lambda slot: (*slot[:4], sorted(slot[4])))
+    return recurring
+
+
+def test_slot_index_matches_pairwise_grouping_on_random_schedules() -> None:
+    """Test the slot index against grouping all pairs of close start times."""
+    rng = random.Random(20241128)  # noqa: S311
+    for _ in range(20):
+        day_count = rng.randint(1, 30)
+        mock_files = [Path(f"2024/03/{day:02d}.yaml") for day in range(day_count)]
+        schedules = []
+        for day in range(day_count):
+            # Cross the DST change on 2024-03-31 with varying UTC offsets
+            offset = timezone(timedelta(hours=rng.choice([2, 3])))
+            programs = [
+                (
+                    rng.choice(["Yle Uutiset", "Aamu", "Ilta", "Yö"]),
+                    datetime(2024, 3, 1, tzinfo=offset)
+                    + timedelta(
+                        days=day,
+                        seconds=rng.randrange(4) * 3 * 3600 + rng.randrange(50 * 60),
+                    ),
+                )
+                for _ in range(rng.randint(0, 40))
+            ]
+            schedules.append(programs)
+        min_occurrences = rng.randint(1, 3)
+
+        with patch("schedule_analyzer.load_schedule") as mock_load:
+            mock_load.side_effect = [create_mock_schedule(p) for p in schedules]
+            result = analyze_recurring_programs(mock_files, min_occurrences)
+
+        assert result == reference_recurring_programs(schedules, min_occurrences)
+
+
+def test_recurring_analysis_state_round_trip(tmp_path: Path) -> None:
+    """Test that a saved analysis state loads back with identical results."""
+    start = datetime(2024, 1, 1, 20, 30, tzinfo=timezone(timedelta(hours=2)))
+    analysis = RecurringAnalysis()
+    analysis.add_programs(
+        [("Show", start + timedelta(days=7 * week, minutes=week)) for week in range(3)],
+    )
+    analysis.save(tmp_path / "state.json")
+    loaded = RecurringAnalysis.load(tmp_path / "state.json")
+    assert loaded.recurring() == analysis.recurring()
+
+
+def test_read_ahead_yields_files_in_order_within_memory_cap(tmp_path: Path) -> None:
+    """Test that reads are started ahead only up to the depth and memory cap."""
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"{index}.yaml"
+        path.write_bytes(bytes([index]) * 10)
+        paths.append(path)
+    reader = ReadAhead(depth=4, memory_cap=25)
+
+    with patch.object(
+        ThreadPoolExecutor,
+        "submit",
+        autospec=True,
+        side_effect=ThreadPoolExecutor.submit,
+    ) as mock_submit:
+        contents = reader.read(paths)
+        assert next(contents) == (paths[0], bytes(10))
+        assert mock_submit.call_count == 2  # noqa: PLR2004
+        assert list(contents) == [(path, path.read_bytes()) for path in paths[1:]]
+
+    assert list(ReadAhead(depth=2, memory_cap=0).read(paths[:3])) == [
+        (path, path.read_bytes()) for path in paths[:3]
+    ]
+
+
+def test_analyze_with_read_ahead_matches_serial(tmp_path: Path) -> None:
+    """Test that parsing prefetched files gives the same result as reading them."""
+    files = write_weekly_schedules(tmp_path, 14)
+    serial = analyze_recurring_programs(files)
+    with (
+        patch("schedule_analyzer.read_ahead", ReadAhead(depth=3)),
+        ScheduleCache(tmp_path / "cache") as cache,
+    ):
+        load_day(files[3], cache)
+        assert analyze_recurring_programs(files, cache=cache) == serial
+        assert analyze_recurring_programs(files, cache=cache) == serial
+        assert cache.hits == 1 + len(files)
+
+
+def test_update_analysis_folds_in_new_files(tmp_path: Path) -> None:
+    """Test that an incremental update only parses files not seen before."""
+    start = datetime(2024, 1, 1, 20, 30, tzinfo=timezone.utc)
+    files = [
+        write_schedule_file(
+            tmp_path,
+            (start + timedelta(days=7 * week)).date(),
+            [("Show", start + timedelta(days=7 * week))],
+        )
+        for week in range(3)
+    ]
+    state_path = tmp_path / "state.json"
+    update_analysis(files[:0:-1], state_path)
+
+    with patch("schedule_analyzer.load_schedule", wraps=load_schedule) as mock_load:
+        analysis = update_analysis(files[::-1], state_path)
+        mock_load.assert_called_once_with(files[0], None)
+    assert analysis.recurring() == analyze_recurring_programs(files[::-1])
+
+    # The oldest week falls out of the window
+    analysis = update_analysis(files[:0:-1], state_path)
+    assert analysis.recurring()[0][4] == {date(2024, 1, 8), date(2024, 1, 15)}
+
+
+def test_update_analysis_matches_full_analysis_every_night(tmp_path: Path) -> None:
+    """Test that nightly incremental updates give exactly the full analysis."""
+    rng = random.Random(4)  # noqa: S311
+    first = date(2024, 1, 1)
+    for day in range(42):
+        start = datetime.combine(
+            first + timedelta(days=day),
+            datetime.min.time(),
+            timezone(timedelta(hours=2)),
+        )
+        write_schedule_file(
+            tmp_path,
+            start.date(),
+            [
+                (f"Show {hour % 4}", start + timedelta(hours=hour, minutes=minutes))
+                for hour in range(6, 26, 2)
+                for minutes in [rng.choice([-14, -3, -1, 0, 0, 2, 4, 14])]
+            ],
+        )
+    state_path = tmp_path / "state.json"
+    update_analysis(
+        find_schedule_files(str(tmp_path), weeks=2, until=first + timedelta(days=13)),
+        state_path,
+    )
+    for day in range(14, 42):
+        files = find_schedule_files(
+            str(tmp_path),
+            weeks=2,
+            until=first + timedelta(days=day),
+        )
+        with patch("schedule_analyzer.load_schedule", wraps=load_schedule) as mock_load:
+            incremental = update_analysis(files, state_path).recurring()
+        assert incremental == analyze_recurring_programs(files)
+        # The new file, the files before it and after the expired one with
+        # programs past midnight on the same dates, and the expired one's dates
+        assert mock_load.call_count <= 3  # noqa: PLR2004
+
+
+def test_file_date_index_counts_weekdays() -> None:
+    """Test that the file date index maps dates to paths and counts weekdays."""
+    files = [
+        Path("2024/01/15.yaml"),  # Monday
+        Path("2024/01/09.yaml"),  # Tuesday
+        Path("2024/01/08.yaml"),  # Monday
+    ]
+    file_index = FileDateIndex(files)
+    assert file_index.paths[date(2024, 1, 9)] == files[1]
+    assert file_index.weekday_counts == [2, 1, 0, 0, 0, 0, 0]
+    assert count_weekday_occurrences(file_index, 0) == count_weekday_occurrences(
+        files,
+        0,
+    )
+
+
+def test_find_schedule_files_within_window(tmp_path: Path) -> None:
+    """Test that only files from the Monday four weeks before the newest are found."""
+    day = date(2023, 11, 25)
+    while day <= date(2024, 2, 10):
+        write_schedule_file(tmp_path, day, [])
+        day += timedelta(days=1)
+    (tmp_path / "2024" / "notes.txt").write_text("not a schedule")
+    (tmp_path / "2025").write_text("not a directory")
+
+    files = find_schedule_files(str(tmp_path))
+
+    # 2024-02-10 minus four weeks is Saturday 2024-01-13, backed up to Monday
+    expected_count = (date(2024, 2, 10) - date(2024, 1, 8)).days + 1
+    assert len(files) == expected_count
+    assert files[0] == tmp_path / "2024" / "02" / "10.yaml"
+    assert files[-1] == tmp_path / "2024" / "01" / "08.yaml"
+    assert files == sorted(files, reverse=True)
+
+
+def test_find_schedule_files_since_until(tmp_path: Path) -> None:
+    """Test that --since and --until bound the window instead of --weeks."""
+    day = date(2023, 11, 25)
+    while day <= date(2024, 2, 10):
+        write_schedule_file(tmp_path, day, [])
+        day += timedelta(days=1)
+
+    files = find_schedule_files(
+        str(tmp_path),
+        since=date(2023, 12, 30),
+        until=date(2024, 1, 2),
+    )
+
+    assert [schedule_file_date(file_path) for file_path in files] == [
+        date(2024, 1, 2),
+        date(2024, 1, 1),
+        date(2023, 12, 31),
+        date(2023, 12, 30),
+    ]
+    weeks_before_until = find_schedule_files(
+        str(tmp_path),
+        weeks=1,
+        until=date(2024, 1, 14),
+    )
+    # 2024-01-14 minus a week is Sunday 2024-01-07, backed up to Monday
+    assert schedule_file_date(weeks_before_until[-1]) == date(2024, 1, 1)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--weeks", "0"],
+        ["--weeks", "-2"],
+        ["--stability", "0"],
+        ["--since", "2024-01-08", "--until", "2024-01-07"],
+    ],
+)
+def test_parse_args_rejects_empty_windows(
+    argv: list[str],
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test that windows which would be empty or inverted are rejected."""
+    monkeypatch.setattr("sys.argv", ["schedule-analyzer", "-d", "channel", *argv])
+    with pytest.raises(SystemExit):
+        parse_args()
+    assert "error:" in capsys.readouterr().err
+
+
+def test_weeks_must_be_positive(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that --weeks accepts one week but not zero in both commands."""
+    argv = ["schedule-analyzer", "-d", "channel", "--weeks", "1"]
+    monkeypatch.setattr("sys.argv", argv)
+    assert parse_args().weeks == 1
+    assert parse_serve_args(["-d", "channel", "--weeks", "1"]).weeks == 1
+    with pytest.raises(SystemExit):
+        parse_serve_args(["-d", "channel", "--weeks", "0"])
+
+
+def test_stability_reports_slots_stable_in_each_window() -> None:
+    """Test that slots are stable in the windows where they aired often enough."""
+    monday = datetime(2024, 1, 1, 7, 0, tzinfo=timezone(timedelta(hours=2)))
+    analysis = RecurringAnalysis()
+    # Newest first, like schedule files are processed
+    for week in reversed(range(8)):
+        start_time = monday + timedelta(weeks=week)
+        programs = [("News", start_time)]
+        if week < 4 and week != 1:  # noqa: PLR2004
+            programs.append(("Morning", start_time + timedelta(hours=1)))
+        if week == 6:  # noqa: PLR2004
+            programs.append(("Special", start_time + timedelta(hours=2)))
+        analysis.add_programs(programs)
+    dates = [monday.date() + timedelta(weeks=week) for week in range(8)]
+
+    assert analysis.stability(dates, window_weeks=4) == [
+        (
+            date(2024, 1, 1),
+            date(2024, 1, 28),
+            [(0, 7, 0, "News"), (0, 8, 0, "Morning")],
+        ),
+        (date(2024, 1, 29), date(2024, 2, 25), [(0, 7, 0, "News")]),
+    ]
+    assert analysis.stability(dates, window_weeks=4, min_share=0.25)[1] == (
+        date(2024, 1, 29),
+        date(2024, 2, 25),
+        [(0, 7, 0, "News"), (0, 9, 0, "Special")],
+    )
+
+    analysis.remove_dates([date(2024, 1, 1).toordinal()])
+    [morning_dates] = [
+        dates for *_, series, dates in analysis.recurring() if series == "Morning"
+    ]
+    assert morning_dates == {date(2024, 1, 15), date(2024, 1, 22)}
+
+
+def test_profiler_records_stages_and_counters() -> None:
+    """Test that an enabled profiler accumulates stage times and counters."""
+    profiler = Profiler()
+    with profiler.stage("ignored"):
+        profiler.count("ignored")
+    profiler.enable()
+    try:
+        for _ in range(2):
+            with profiler.stage("stage"):
+                profiler.count("events", 3)
+        assert not tracemalloc.is_tracing()
+    finally:
+        profiler.disable()
+
+    report = profiler.report()
+    assert set(report["stages"]) == {"stage"}
+    assert report["stages"]["stage"]["calls"] == 2  # noqa: PLR2004
+    assert report["stages"]["stage"]["wall_seconds"] >= 0
+    assert "peak_memory_bytes" not in report["stages"]["stage"]
+    assert report["counters"] == {"events": 6}
+
+
+def test_profiler_traces_memory_on_request() -> None:
+    """Test that peak memory is traced only while memory profiling is enabled."""
+    profiler = Profiler()
+    profiler.enable(memory=True)
+    try:
+        assert tracemalloc.is_tracing()
+        with profiler.stage("stage"):
+            data = [0] * 100_000
+        del data
+    finally:
+        profiler.disable()
+
+    assert not tracemalloc.is_tracing()
+    assert profiler.report()["stages"]["stage"]["peak_memory_bytes"] >= 800_000  # noqa: PLR2004
+
+
+def test_analyze_channels_matches_single_channel_analysis(tmp_path: Path) -> None:
+    """Test that analyzing channels together gives per-channel results."""
+    start = datetime(2024, 1, 1, 6, 0, tzinfo=timezone.utc)
+    channel_files = {}
+    for channel in range(3):
+        channel_files[f"channel-{channel}"] = [
+            write_schedule_file(
+                tmp_path / f"channel-{channel}",
+                (start + timedelta(days=day)).date(),
+                [
+                    (f"Show {channel}", start + timedelta(days=day, hours=channel)),
+                    ("News", start + timedelta(days=day, hours=day % 3)),
+                ],
+            )
+            for day in range(14)
+        ][::-1]
+
+    analyses = analyze_channels(channel_files, jobs=2)
+
+    for name, files in channel_files.items():
+        assert analyses[name].recurring() == analyze_recurring_programs(files)
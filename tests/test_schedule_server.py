@@ -0,0 +1,109 @@
+"""Tests for the schedule_server module."""
+
+from __future__ import annotations
+
+import gzip
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+from test_schedule_analyzer import write_schedule_file
+
+from schedule_server import (
+    IMMUTABLE_CACHE_CONTROL,
+    Resource,
+    ScheduleModel,
+    ScheduleServer,
+    accepts_gzip,
+)
+from templates.html_generator import asset_names
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_schedule_model_renders_page_only_when_files_change(tmp_path: Path) -> None:
+    """Test that refreshing re-renders the page only after schedule files change."""
+    start = datetime.now(timezone.utc).replace(hour=18, minute=0, second=0)
+    for day in range(8):
+        start_time = start - timedelta(days=day)
+        write_schedule_file(tmp_path, start_time.date(), [("News", start_time)])
+    model = ScheduleModel(str(tmp_path))
+
+    assert model.refresh()
+    page = model.page
+    assert b"News" in page.body
+    with patch("schedule_server.refresh_analysis") as mock_refresh:
+        assert not model.refresh()
+        mock_refresh.assert_not_called()
+    assert model.page is page
+
+    start_time = start + timedelta(days=1)
+    write_schedule_file(tmp_path, start_time.date(), [("Sports", start_time)])
+    assert model.refresh()
+    assert model.page is not page
+    assert len(model.analysis.files) == 9  # noqa: PLR2004
+
+
+def test_schedule_server_sends_compressed_and_conditional_responses(
+    tmp_path: Path,
+) -> None:
+    """Test that the server sends gzip bodies, validators and 304 responses."""
+    start = datetime.now(timezone.utc).replace(hour=18, minute=0, second=0)
+    write_schedule_file(tmp_path, start.date(), [("News", start)])
+    model = ScheduleModel(str(tmp_path))
+    model.refresh()
+    server = ScheduleServer(("127.0.0.1", 0), model)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        request = Request(f"{url}/", headers={"Accept-Encoding": "br, gzip"})  # noqa: S310
+        with urlopen(request) as response:  # noqa: S310
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert gzip.decompress(response.read()) == model.page.body
+            etag = response.headers["ETag"]
+        style = "/" + asset_names()["style.css"]
+        assert f'href="{style[1:]}"' in model.page.body.decode()
+        with urlopen(url + style) as response:  # noqa: S310
+            assert response.headers["Content-Type"] == "text/css; charset=utf-8"
+            assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+            assert "Content-Encoding" not in response.headers
+            last_modified = response.headers["Last-Modified"]
+
+        for path, header, value in [
+            ("/", "If-None-Match", etag),
+            (style, "If-Modified-Since", last_modified),
+            ("/missing.js", "Accept", "*/*"),
+        ]:
+            with pytest.raises(HTTPError) as exc_info:
+                urlopen(Request(url + path, headers={header: value}))  # noqa: S310
+            expected = 404 if path == "/missing.js" else 304
+            assert exc_info.value.code == expected
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_accepts_gzip() -> None:
+    """Test parsing of the Accept-Encoding header."""
+    assert accepts_gzip("gzip, deflate")
+    assert accepts_gzip("br;q=1.0, *;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("")
+
+
+def test_resource_is_fresh_compares_dates_in_utc() -> None:
+    """Test that If-Modified-Since dates without a zone are taken to be in UTC."""
+    modified = datetime(2024, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+    resource = Resource(b"body", "text/plain", modified)
+
+    assert resource.is_fresh(None, "Mon, 01 Jan 2024 12:00:00 GMT")
+    assert resource.is_fresh(None, "Mon, 01 Jan 2024 12:00:00 -0000")
+    assert not resource.is_fresh(None, "Mon, 01 Jan 2024 11:59:59 -0000")
+    assert not resource.is_fresh(None, "not a date")
+    assert resource.is_fresh(f'W/"{resource.etag}-gzip"', None)